@@ -0,0 +1,267 @@
+# app/attribute_index.py
+
+import itertools
+import json
+import os
+import re
+
+import numpy as np
+
+from app.matcher import PatternMatcher
+
+# Docstore metadata fields kept in the inverted index
+INDEXED_ATTRIBUTES = ("body style", "powertrain", "seats")
+PRICE_ATTRIBUTE = "starting price"
+
+_SEATS_PATTERN = re.compile(r"\b(\d+)[\s-]*(?:seats?|seater)\b")
+_MAX_PRICE_PATTERN = re.compile(
+    r"\b(?:under|below|less than|cheaper than|up to|max(?:imum)?|within)\s+(?:aed\s*)?([\d][\d,.]*)\s*(k|m)?\b")
+_MIN_PRICE_PATTERN = re.compile(
+    r"\b(?:over|above|more than|at least|from)\s+(?:aed\s*)?([\d][\d,.]*)\s*(k|m)?\b")
+
+
+def parse_price(value):
+    """Parse a price such as "AED 285,000" into a float, or None"""
+    digits = re.sub(r"[^\d.]", "", value or "")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _parse_amount(number, suffix):
+    amount = parse_price(number)
+    if amount is None:
+        return None
+    amount *= {"k": 1_000, "m": 1_000_000}.get(suffix, 1)
+    # Small numbers are seat counts or years ("at least 5 seats"), not prices
+    return amount if amount >= 1_000 else None
+
+
+class AttributeIndex:
+    """
+    In-memory index over parsed docstore attributes.
+
+    Keeps an inverted index (attribute value -> docstore positions) for body
+    style, powertrain and seats, and the starting prices sorted alongside
+    their positions so price ranges are answered with a binary search.
+
+    Building it reads the metadata of every document, so for a mapped
+    docstore embed_chunks saves it next to docstore.bin; `sources` holds
+    the fingerprint of the docstore files it was built from (see BM25Index).
+    """
+
+    def __init__(self, docs):
+        postings = {attr: {} for attr in INDEXED_ATTRIBUTES}
+        model_names, prices, price_positions = [], [], []
+        for pos, doc in enumerate(docs):
+            metadata = doc.get("metadata", {})
+            model_names.append(metadata.get("model", "").lower())
+            for attr in INDEXED_ATTRIBUTES:
+                if attr in metadata:
+                    postings[attr].setdefault(metadata[attr].lower(), []).append(pos)
+
+            price = parse_price(metadata.get(PRICE_ATTRIBUTE))
+            if price is not None:
+                prices.append(price)
+                price_positions.append(pos)
+
+        order = np.argsort(prices, kind="stable")
+        self._init(model_names, postings, np.asarray(prices, dtype=np.float64)[order],
+                   np.asarray(price_positions, dtype=np.int64)[order])
+
+    def _init(self, model_names, postings, prices, price_positions, sources=None):
+        self.n_docs = len(model_names)
+        self.postings = postings
+        self.model_names = model_names
+        # Model name -> positions, in docstore order
+        self.model_positions = {}
+        for pos, name in enumerate(model_names):
+            if name:
+                self.model_positions.setdefault(name, []).append(pos)
+        self._model_matcher = None
+        self.prices = prices
+        self.price_positions = price_positions
+        self.sources = dict(sources or {})
+
+        # Whole-word patterns for values that can be spotted in free text
+        self._value_patterns = {
+            attr: [(value, re.compile(rf"\b{re.escape(value)}s?\b"))
+                   for value in self.postings[attr]]
+            for attr in ("body style", "powertrain")
+        }
+
+    def save(self, path):
+        """Write the index to a .npz file (atomically)"""
+        names = list(self.model_positions)
+        name_ids = np.full(self.n_docs, -1, dtype=np.int32)
+        for i, name in enumerate(names):
+            name_ids[self.model_positions[name]] = i
+
+        arrays = {}
+        for i, attr in enumerate(INDEXED_ATTRIBUTES):
+            postings = self.postings[attr]
+            arrays[f"values_{i}"] = np.array(list(postings), dtype=str)
+            arrays[f"offsets_{i}"] = np.cumsum([0] + [len(p) for p in postings.values()])
+            arrays[f"positions_{i}"] = np.fromiter(
+                itertools.chain.from_iterable(postings.values()), dtype=np.int64)
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, attributes=np.array(INDEXED_ATTRIBUTES), model_names=np.array(names, dtype=str),
+                 model_name_ids=name_ids, prices=self.prices, price_positions=self.price_positions,
+                 sources=np.array(json.dumps(self.sources)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save().
+
+        Raises:
+            ValueError: If it was saved with different INDEXED_ATTRIBUTES
+        """
+        with np.load(path) as data:
+            if tuple(data["attributes"].tolist()) != INDEXED_ATTRIBUTES:
+                raise ValueError(f"{path} indexes different attributes")
+            names = data["model_names"].tolist()
+            model_names = [names[i] if i >= 0 else "" for i in data["model_name_ids"].tolist()]
+            postings = {}
+            for i, attr in enumerate(INDEXED_ATTRIBUTES):
+                offsets = data[f"offsets_{i}"].tolist()
+                positions = data[f"positions_{i}"].tolist()
+                postings[attr] = {value: positions[offsets[j]:offsets[j + 1]]
+                                  for j, value in enumerate(data[f"values_{i}"].tolist())}
+            index = cls.__new__(cls)
+            index._init(model_names, postings, data["prices"], data["price_positions"],
+                        json.loads(str(data["sources"])))
+        return index
+
+    @staticmethod
+    def load_sources(path):
+        """The `sources` recorded in an index written by save(), or None if there is none"""
+        try:
+            with np.load(path) as data:
+                return json.loads(str(data["sources"]))
+        except FileNotFoundError:
+            return None
+
+    def match(self, attr, value):
+        """
+        Positions whose `attr` contains `value` (case-insensitive).
+
+        Returns:
+            set: Matching positions, or None if `attr` is not indexed
+        """
+        postings = self.postings.get(attr.lower())
+        if postings is None:
+            return None
+
+        value = value.lower()
+
+        # Substring semantics, checked against the distinct values only
+        matches = set()
+        for indexed_value, positions in postings.items():
+            if value in indexed_value:
+                matches.update(positions)
+        return matches
+
+    @property
+    def model_matcher(self):
+        """PatternMatcher over the distinct model names, built on first use"""
+        if self._model_matcher is None:
+            self._model_matcher = PatternMatcher((name, name) for name in self.model_positions)
+        return self._model_matcher
+
+    def find_model(self, model_name):
+        """Position of the document named `model_name`, mentioned in it or whose name contains it"""
+        model_name = model_name.lower().strip()
+        positions = self.model_positions.get(model_name)
+        if positions:
+            return positions[0]
+
+        mentioned = self.mentioned_models(model_name)
+        if mentioned:
+            return mentioned[0]
+
+        # Partial names ("GLE" for "GLE 450"); names are in docstore order
+        for name, positions in self.model_positions.items():
+            if model_name in name:
+                return positions[0]
+        return None
+
+    def mentioned_models(self, text):
+        """
+        Positions of the documents whose full model name appears in `text`.
+
+        Names must match on word boundaries, and a name inside a longer
+        mentioned name ("GLE 450" in "GLE 450 Coupe") does not count.
+
+        Returns:
+            list: Matching positions, in order of mention
+        """
+        positions = []
+        for _, _, name in self.model_matcher.find(text):
+            positions.extend(pos for pos in self.model_positions[name] if pos not in positions)
+        return positions
+
+    def price_range(self, min_price=None, max_price=None):
+        """Positions whose starting price lies in [min_price, max_price]"""
+        lo = 0 if min_price is None else np.searchsorted(self.prices, min_price, side="left")
+        hi = len(self.prices) if max_price is None else np.searchsorted(self.prices, max_price, side="right")
+        return set(self.price_positions[lo:hi].tolist())
+
+    def filter(self, criteria=None, min_price=None, max_price=None):
+        """
+        Intersect the indexed criteria and the price range.
+
+        Criteria on attributes that are not indexed are ignored here and left
+        to the caller.
+
+        Returns:
+            list: Sorted matching positions, or None if nothing was filtered on
+        """
+        candidates = None
+        for attr, value in (criteria or {}).items():
+            matches = self.match(attr, value)
+            if matches is None:
+                continue
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        if min_price is not None or max_price is not None:
+            matches = self.price_range(min_price, max_price)
+            candidates = matches if candidates is None else candidates & matches
+
+        return None if candidates is None else sorted(candidates)
+
+    def parse_filters(self, query):
+        """
+        Extract structured filters from a free-text query.
+
+        Recognizes indexed body styles and powertrains, "N seats"/"N-seater"
+        and price bounds such as "under AED 400,000" or "above 300k".
+
+        Returns:
+            dict: Keyword arguments for filter() (empty if nothing was found)
+        """
+        text = query.lower()
+        criteria = {}
+        for attr, patterns in self._value_patterns.items():
+            for value, pattern in patterns:
+                if pattern.search(text):
+                    criteria[attr] = value
+                    break
+
+        seats = _SEATS_PATTERN.search(text)
+        if seats and seats.group(1) in self.postings["seats"]:
+            criteria["seats"] = seats.group(1)
+
+        filters = {"criteria": criteria} if criteria else {}
+        max_price = _MAX_PRICE_PATTERN.search(text)
+        if max_price:
+            filters["max_price"] = _parse_amount(*max_price.groups())
+        min_price = _MIN_PRICE_PATTERN.search(text)
+        if min_price:
+            filters["min_price"] = _parse_amount(*min_price.groups())
+        return {k: v for k, v in filters.items() if v is not None}
@@ -0,0 +1,146 @@
+# app/bm25.py
+
+import json
+import math
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Terms in more than this fraction of the documents (field labels such as
+# "model" or "price") carry almost no weight and are skipped at query time.
+# Only once there are BM25_MIN_DOCS_FOR_MAX_DF documents: in a tiny corpus
+# every term can pass the cut, and IDF alone ranks them well enough.
+BM25_MAX_DF = 0.9
+BM25_MIN_DOCS_FOR_MAX_DF = 10
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the docstore, stored as an inverted index.
+
+    Postings are kept term by term in flat arrays (`rows`, `tfs`, sliced by
+    `offsets`), so a query only touches the postings of its own terms.
+    Rows are docstore positions, in the order Retriever.docs has them.
+    `sources` maps the names of the docstore files the index was built
+    from to their fingerprints (app.docstore.file_fingerprint), so a
+    reader can tell whether it still matches the docstore it has loaded.
+    """
+
+    def __init__(self, terms, offsets, rows, tfs, doc_lengths, k1=BM25_K1, b=BM25_B,
+                 sources=None):
+        self.terms = list(terms)
+        self.vocab = {term: i for i, term in enumerate(self.terms)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.tfs = np.asarray(tfs, dtype=np.uint16)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.k1 = k1
+        self.b = b
+        self.sources = dict(sources or {})
+        self.n_docs = len(self.doc_lengths)
+        self.avgdl = float(self.doc_lengths.mean()) if self.n_docs else 0.0
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B):
+        """Index an iterable of document texts (row i is the i-th text)"""
+        vocab = {}
+        term_ids, rows, tfs, doc_lengths = array("i"), array("i"), array("H"), array("f")
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                rows.append(row)
+                tfs.append(min(tf, 0xFFFF))
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        # Group postings by term; stable, so rows stay ascending within a term
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=offsets[1:])
+        return cls(vocab, offsets, np.frombuffer(rows, dtype=np.int32)[order],
+                   np.frombuffer(tfs, dtype=np.uint16)[order],
+                   np.frombuffer(doc_lengths, dtype=np.float32), k1, b)
+
+    def save(self, path):
+        """Write the index to a .npz file (atomically)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, terms=np.array(self.terms, dtype=str), offsets=self.offsets,
+                 rows=self.rows, tfs=self.tfs, doc_lengths=self.doc_lengths,
+                 params=np.array([self.k1, self.b]), sources=np.array(json.dumps(self.sources)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            sources = json.loads(str(data["sources"])) if "sources" in data else {}
+            return cls(data["terms"].tolist(), data["offsets"], data["rows"], data["tfs"],
+                       data["doc_lengths"], k1, b, sources)
+
+    def search(self, query, top_k=5, candidates=None):
+        """
+        Best-scoring rows for a query.
+
+        Args:
+            query (str): The search query
+            top_k (int): Number of results to return
+            candidates (list[int], optional): Only score these rows
+
+        Returns:
+            list: (row, score) pairs, best first
+        """
+        max_df = self.n_docs
+        if self.n_docs >= BM25_MIN_DOCS_FOR_MAX_DF:
+            max_df = BM25_MAX_DF * self.n_docs
+        parts = []
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            df = int(end - start)
+            if df > max_df:
+                continue
+
+            rows = self.rows[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / self.avgdl)
+            parts.append((rows, idf * tf * (self.k1 + 1) / (tf + norm)))
+        if not parts:
+            return []
+
+        rows = np.concatenate([p[0] for p in parts])
+        scores = np.concatenate([p[1] for p in parts])
+        if len(parts) > 1 and len(rows) * 16 > self.n_docs:
+            # Summing into a dense array beats sorting once the postings are
+            # a sizeable part of the corpus (scores are always positive)
+            dense = np.bincount(rows, weights=scores, minlength=self.n_docs)
+            rows = np.flatnonzero(dense)
+            scores = dense[rows]
+        elif len(parts) > 1:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        if candidates is not None:
+            keep = np.isin(rows, np.asarray(candidates, dtype=np.int64))
+            rows, scores = rows[keep], scores[keep]
+        if len(rows) > top_k:
+            top = np.argpartition(-scores, top_k)[:top_k]
+            rows, scores = rows[top], scores[top]
+
+        # Best first, ties by row
+        order = np.lexsort((rows, -scores))
+        return [(int(rows[i]), float(scores[i])) for i in order]
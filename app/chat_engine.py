@@ -1,87 +1,512 @@
 # app/chat_engine.py
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from app.intent_cls import IntentSentimentClassifier
-from app.query_interface import search
-from app.llm_backend import generate
+from app.query_interface import encode_queries, get_retriever, load_model, search, search_many
+from app.llm_backend import (FALLBACK_RESPONSE, count_tokens, generate, generate_stream,
+                             load_llm, save_state)
+from app.fast_path import FastPathResponder
+from app.model_loading import load_times
+from app.response_cache import ResponseCache
+from app.sessions import SessionStore
+from app.tracing import span, tracer
 
 intent_clf = IntentSentimentClassifier()
 
+# Intents whose answers need car information from the docstore
+RETRIEVAL_INTENTS = {"informed", "price_inquiry", "compare_models", "availability"}
 
-def generate_prompt(user_input: str, intent: str, sentiment: str, chunks: list[str]) -> str:
-    context = "\n".join(f"- {c}" for c in chunks) if chunks else "None"
+# Run intent, sentiment and speculative retrieval in parallel threads
+PARALLEL_STAGES = True
 
-    # Create a more detailed system prompt based on intent
-    system_instructions = ""
-    if intent == "informed":
-        system_instructions = "The customer seems to know what they want. Provide specific information about the models they're asking about."
-    elif intent == "exploratory":
-        system_instructions = "The customer is exploring options. Help them understand the different models and suggest appropriate ones based on their needs."
-    elif intent == "test_drive":
-        system_instructions = "The customer is interested in a test drive. Guide them on how to book one and what to expect."
-    elif intent == "compare_models":
-        system_instructions = "The customer wants to compare models. Provide a clear comparison of the models mentioned."
-    elif intent == "price_inquiry":
-        system_instructions = "The customer is asking about prices. Be specific about pricing and mention any current offers."
-    elif intent == "availability":
-        system_instructions = "The customer wants to know about availability. Provide information about stock and delivery times."
-    elif intent == "booking":
-        system_instructions = "The customer wants to book an appointment. Guide them on how to do so."
-    elif intent == "after_sales":
-        system_instructions = "The customer is asking about after-sales services. Provide information about warranty, maintenance, etc."
-    elif intent == "exit":
-        system_instructions = "The customer wants to end the conversation. Say goodbye politely."
+_stage_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="turn")
 
-    # Phi-2 works well with this prompt format
-    return f"""
+# Answer paraphrases of recent questions from a semantic cache instead of the LLM
+RESPONSE_CACHE = True
+response_cache = ResponseCache()
+
+# Answer canned intents and single-model price/availability questions from templates
+FAST_PATH = True
+fast_path = FastPathResponder()
+
+
+def _load_retrieval():
+    load_model()
+    get_retriever().refresh()
+
+
+# Models loaded by warm_up(), keyed by the name they report load times under
+MODEL_LOADERS = {
+    "intent": intent_clf.load_intent_model,
+    "sentiment": intent_clf.load_sentiment_model,
+    "embedding": _load_retrieval,
+    "llm": load_llm,
+}
+
+
+def warm_up(on_loaded=None) -> dict:
+    """
+    Load all models in parallel background threads.
+
+    Models are otherwise loaded lazily on first use; warming them up front
+    moves that cost out of the first turn.
+
+    Args:
+        on_loaded (callable, optional): Called with each model name as it finishes
+
+    Returns:
+        dict: Load time in seconds per model
+    """
+    with ThreadPoolExecutor(max_workers=len(MODEL_LOADERS), thread_name_prefix="warmup") as pool:
+        futures = {pool.submit(loader): name for name, loader in MODEL_LOADERS.items()}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error loading {futures[future]} model: {e}")
+            if on_loaded is not None:
+                on_loaded(futures[future])
+    return dict(load_times)
+
+
+def start_warm_up(on_loaded=None) -> threading.Thread:
+    """Run warm_up() in a daemon thread and return the thread"""
+    thread = threading.Thread(target=warm_up, args=(on_loaded,), daemon=True)
+    thread.start()
+    return thread
+
+
+# Extra guidance given to the LLM for each intent
+INTENT_INSTRUCTIONS = {
+    "informed": "The customer seems to know what they want. Provide specific information about the models they're asking about.",
+    "exploratory": "The customer is exploring options. Help them understand the different models and suggest appropriate ones based on their needs.",
+    "test_drive": "The customer is interested in a test drive. Guide them on how to book one and what to expect.",
+    "compare_models": "The customer wants to compare models. Provide a clear comparison of the models mentioned.",
+    "price_inquiry": "The customer is asking about prices. Be specific about pricing and mention any current offers.",
+    "availability": "The customer wants to know about availability. Provide information about stock and delivery times.",
+    "booking": "The customer wants to book an appointment. Guide them on how to do so.",
+    "after_sales": "The customer is asking about after-sales services. Provide information about warranty, maintenance, etc.",
+    "exit": "The customer wants to end the conversation. Say goodbye politely.",
+}
+
+SYSTEM_PROMPT = """
 You are a helpful AI assistant for Mercedes-Benz Gargash, a luxury car dealer in the UAE. Your job is to guide car buyers in a friendly and expert way.
+Respond in a helpful, conversational tone as if you are guiding a real customer at a Mercedes-Benz dealership in the UAE. 
+Be concise but informative, and always maintain the premium luxury feel of the Mercedes-Benz brand.
+If the customer is asking about prices, always mention that prices are in AED (UAE Dirhams).
+"""
+
+
+def generate_prompt_parts(user_input: str, intent: str, sentiment: str, chunks: list[str]) -> tuple[str, str]:
+    """
+    Build the prompt as a fixed per-intent prefix and a per-turn suffix.
+
+    The prefix only depends on the intent, so the LLM backend can cache its
+    evaluated state and prefill just the suffix on each turn.
+    """
+    context = "\n".join(f"- {c}" for c in chunks) if chunks else "None"
 
+    # Phi-2 works well with this prompt format
+    prefix = f"""{SYSTEM_PROMPT}
 User intent: {intent}
+Additional instructions: {INTENT_INSTRUCTIONS.get(intent, "")}
+"""
+    suffix = f"""User sentiment: {sentiment}
+
+User message: "{user_input}"
+
+Relevant information from our Mercedes-Benz database:
+{context}
+
+Assistant:"""
+    return prefix, suffix
+
+
+def generate_prompt(user_input: str, intent: str, sentiment: str, chunks: list[str]) -> str:
+    prefix, suffix = generate_prompt_parts(user_input, intent, sentiment, chunks)
+    return prefix + suffix
+
+
+EMPTY_INPUT_RESPONSE = "I'm here to help with any questions about Mercedes-Benz vehicles. What would you like to know?"
+ERROR_RESPONSE = "I apologize for the inconvenience. I'm having trouble processing your request. How else can I assist you with our Mercedes-Benz vehicles?"
+
+
+def _search_docs(user_input: str) -> list[dict]:
+    return search(user_input, return_metadata=True)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def analyze_turn(user_input: str, timings: dict | None = None) -> tuple[str, str, list[dict]]:
+    """
+    Work out intent, sentiment and retrieved documents for a message.
+
+    Returns:
+        tuple: (intent label, sentiment label, retrieved documents)
+    """
+    intent_result, sentiment_result, chunks = _analyze_turn(user_input, timings)
+    return intent_result["label"], sentiment_result["label"], chunks
+
+
+def _analyze_turn(user_input: str, timings: dict | None = None) -> tuple[dict, dict, list[dict]]:
+    """
+    analyze_turn() with the full classifier results.
+
+    With PARALLEL_STAGES the three stages run concurrently; retrieval is
+    started speculatively and its results are dropped if the intent turns
+    out not to need them.
+
+    Args:
+        user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+
+    Returns:
+        tuple: (intent result, sentiment result, retrieved documents)
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    if PARALLEL_STAGES:
+        intent_future = _stage_executor.submit(_timed, intent_clf.classify_intent, user_input)
+        sentiment_future = _stage_executor.submit(_timed, intent_clf.classify_sentiment, user_input)
+        search_future = _stage_executor.submit(_timed, _search_docs, user_input)
+
+        intent_result, timings["intent_ms"] = intent_future.result()
+        intent = intent_result["label"]
+        if intent in RETRIEVAL_INTENTS:
+            chunks, timings["retrieval_ms"] = search_future.result()
+        else:
+            # Not needed: drop the speculative search (cancelled if not yet started)
+            search_future.cancel()
+            chunks = []
+        sentiment_result, timings["sentiment_ms"] = sentiment_future.result()
+    else:
+        intent_result, timings["intent_ms"] = _timed(intent_clf.classify_intent, user_input)
+        sentiment_result, timings["sentiment_ms"] = _timed(intent_clf.classify_sentiment, user_input)
+        intent = intent_result["label"]
+        if intent in RETRIEVAL_INTENTS:
+            chunks, timings["retrieval_ms"] = _timed(_search_docs, user_input)
+        else:
+            chunks = []
+
+    # Wall time until the prompt inputs were ready (the turn's critical path)
+    timings["analysis_ms"] = (time.perf_counter() - start) * 1000
+    return intent_result, sentiment_result, chunks
+
+
+def analyze_batch(messages: list[str], batch_size: int = 16, timings: dict | None = None) -> list[dict]:
+    """
+    Batch version of analyze_turn() for offline processing.
+
+    Intent and sentiment are classified `batch_size` messages per forward
+    pass and all messages that need retrieval are searched in one batch.
+
+    Args:
+        messages (list[str]): The user messages
+        batch_size (int): Messages per classifier forward pass
+        timings (dict, optional): Per-stage wall times in ms are added to it
+
+    Returns:
+        list[dict]: Per message, the "intent" and "sentiment" classifier
+            results and the retrieved "chunks"
+    """
+    timings = {} if timings is None else timings
+
+    intents, intent_ms = _timed(intent_clf.classify_intent_batch, messages, batch_size)
+    sentiments, sentiment_ms = _timed(intent_clf.classify_sentiment_batch, messages, batch_size)
+
+    needs_retrieval = [i for i, result in enumerate(intents) if result["label"] in RETRIEVAL_INTENTS]
+    chunks = [[] for _ in messages]
+    retrieved, retrieval_ms = _timed(search_many, [messages[i] for i in needs_retrieval])
+    for i, result in zip(needs_retrieval, retrieved):
+        chunks[i] = result
+
+    for key, ms in (("intent_ms", intent_ms), ("sentiment_ms", sentiment_ms),
+                    ("retrieval_ms", retrieval_ms)):
+        timings[key] = timings.get(key, 0.0) + ms
+    return [
+        {"intent": intent, "sentiment": sentiment, "chunks": chunk_texts}
+        for intent, sentiment, chunk_texts in zip(intents, sentiments, chunks)
+    ]
+
+
+def build_turn_prompt(user_input: str, timings: dict | None = None) -> tuple[str, str]:
+    """
+    Classify the user input, retrieve context if needed and build the prompt.
+
+    Args:
+        user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+
+    Returns:
+        tuple[str, str]: The cacheable prompt prefix and the per-turn suffix
+    """
+    intent, sentiment, docs = analyze_turn(user_input, timings)
+    with span("prompt"):
+        return generate_prompt_parts(user_input, intent, sentiment, [doc["text"] for doc in docs])
+
+
+def prepare_turn(user_input: str, timings: dict | None = None):
+    """
+    Analyze a message and answer it from a template or the response cache if possible.
+
+    Args:
+        user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+
+    Returns:
+        tuple: (ready response or None, (prefix, suffix) prompt parts or
+            None when a response is ready, cache slot to pass to
+            store_response())
+    """
+    intent_result, sentiment_result, docs = _analyze_turn(user_input, timings)
+    intent, sentiment = intent_result["label"], sentiment_result["label"]
+
+    if FAST_PATH:
+        with span("fast_path"):
+            response = fast_path.respond(user_input, intent, intent_result["confidence"],
+                                         get_retriever())
+        if response is not None:
+            return response, None, None
+
+    slot = None
+    if RESPONSE_CACHE:
+        with span("response_cache"):
+            # Retrieval queries hit the query embedding cache here
+            q_vecs = encode_queries([user_input])
+            if q_vecs is not None:
+                retriever = get_retriever()
+                retriever.refresh()
+                slot = ((intent, tuple(doc["id"] for doc in docs)), q_vecs[0], retriever.version)
+                cached = response_cache.get(*slot)
+        if slot is not None and cached is not None:
+            return cached, None, slot
+
+    with span("prompt"):
+        prompt = generate_prompt_parts(user_input, intent, sentiment, [doc["text"] for doc in docs])
+    return None, prompt, slot
+
+
+def _stream_failed(pieces: list[str]) -> bool:
+    """Whether a generate_stream() output ended in the fallback it yields on errors"""
+    return bool(pieces) and pieces[-1] == FALLBACK_RESPONSE
+
+
+def store_response(slot, response: str) -> None:
+    """Cache a generated response under the slot returned by prepare_turn()"""
+    if slot is not None and response and response not in (FALLBACK_RESPONSE, ERROR_RESPONSE):
+        key, vector, version = slot
+        response_cache.put(key, vector, response, version)
+
+
+# Multi-turn sessions; their prompts start with the intent-independent system prompt
+sessions = SessionStore(header=SYSTEM_PROMPT)
+
+
+def generate_turn_block(user_input: str, intent: str, sentiment: str, chunks: list[str]) -> str:
+    """One turn of a session prompt, which is the session transcript followed by the new turn"""
+    context = "\n".join(f"- {c}" for c in chunks) if chunks else "None"
+    return f"""
+User intent: {intent}
+Additional instructions: {INTENT_INSTRUCTIONS.get(intent, "")}
 User sentiment: {sentiment}
-Additional instructions: {system_instructions}
 
 User message: "{user_input}"
 
 Relevant information from our Mercedes-Benz database:
 {context}
 
-Respond in a helpful, conversational tone as if you are guiding a real customer at a Mercedes-Benz dealership in the UAE. 
-Be concise but informative, and always maintain the premium luxury feel of the Mercedes-Benz brand.
-If the customer is asking about prices, always mention that prices are in AED (UAE Dirhams).
 Assistant:"""
 
 
-def handle_user_input(user_input: str) -> str:
+def prepare_session_turn(session_id: str, user_input: str, timings: dict | None = None):
+    """
+    Analyze a message of a multi-turn session and build its prompt.
+
+    Messages the fast path can answer are answered from a template and
+    recorded in the session history right away. The caller must hold the
+    session (sessions.begin_turn()) until the turn is finished.
+
+    Session prompts carry the conversation so far, so they neither reuse
+    the per-intent prefix state nor look up or fill the response cache.
+
+    Args:
+        session_id (str): The conversation the message belongs to
+        user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+
+    Returns:
+        tuple: (ready response or None, turn), the turn being (session,
+            prompt, turn block) to pass to generate_session_response() or
+            finish_session_turn() when there is no ready response
+    """
+    intent_result, sentiment_result, docs = _analyze_turn(user_input, timings)
+    intent, sentiment = intent_result["label"], sentiment_result["label"]
+    session = sessions.get(session_id)
+    with span("prompt"):
+        block = generate_turn_block(user_input, intent, sentiment, [doc["text"] for doc in docs])
+    turn = (session, session.transcript + block, block)
+
+    if FAST_PATH:
+        with span("fast_path"):
+            response = fast_path.respond(user_input, intent, intent_result["confidence"],
+                                         get_retriever())
+        if response is not None:
+            # No model state to keep: the next turn prefills the history
+            finish_session_turn(turn, response)
+            return response, turn
+    return None, turn
+
+
+def finish_session_turn(turn, response: str, snapshot: bool = False) -> None:
+    """
+    Add a turn and its response to the session history.
+
+    With `snapshot`, the turn was generated by this process's model and its
+    state is saved along with the turn, unless the turn is not kept or the
+    history is about to be trimmed (which would discard the snapshot).
+    """
+    session, _, block = turn
+    if not response or response in (FALLBACK_RESPONSE, ERROR_RESPONSE):
+        return
+    text = f"{block} {response}\n"
+    state = None
+    if snapshot:
+        n_tokens = count_tokens(text)
+        if sessions.fits(session, n_tokens):
+            state = save_state()
+    else:
+        # The model may live in another process (LLM worker pool), so the
+        # length is estimated instead of tokenized
+        n_tokens = len(text) // 3
+    sessions.record_turn(session, text, n_tokens, state)
+
+
+def generate_session_response(turn, **kwargs) -> str:
+    """Generate a session turn from the session's last snapshot and keep the new one"""
+    session, prompt, _ = turn
+    response = generate(prompt, state=sessions.load_snapshot(session), **kwargs)
+    finish_session_turn(turn, response, snapshot=True)
+    return response
+
+
+def handle_user_input(user_input: str, timings: dict | None = None, session_id: str | None = None) -> str:
     """
     Process user input and generate a response.
 
     Args:
         user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+        session_id (str, optional): Answer in the context of this session's
+            earlier turns
 
     Returns:
         str: The assistant's response
     """
     # Handle empty input gracefully
     if not user_input or user_input.strip() == "":
-        return "I'm here to help with any questions about Mercedes-Benz vehicles. What would you like to know?"
+        return EMPTY_INPUT_RESPONSE
 
     try:
-        # Analyze intent and sentiment
-        analysis = intent_clf.classify_all(user_input)
-        intent = analysis["intent"]["label"]
-        sentiment = analysis["sentiment"]["label"]
-
-        # Retrieve relevant information based on intent
-        if intent in {"informed", "price_inquiry", "compare_models", "availability"}:
-            # For these intents, we want to search for relevant car info
-            chunks = search(user_input)
-        else:
-            chunks = []
+        # Session answers depend on earlier turns, which the response cache does not see
+        if session_id is not None:
+            sessions.begin_turn(session_id)
+            try:
+                response, turn = prepare_session_turn(session_id, user_input, timings)
+                return response if response is not None else generate_session_response(turn)
+            finally:
+                sessions.end_turn(session_id)
+
+        # Answer from a template, the cache or generate
+        cached, prompt, slot = prepare_turn(user_input, timings)
+        if cached is not None:
+            return cached
+        prefix, suffix = prompt
+        response = generate(prefix + suffix, prefix=prefix)
+        store_response(slot, response)
+        return response
+
+    except Exception as e:
+        # Provide a graceful fallback in case of errors
+        print(f"Error processing input: {e}")
+        tracer.increment("errors_total", "turn")
+        return ERROR_RESPONSE
+
+
+def _stream_session_turn(session_id: str, user_input: str, timings: dict | None = None):
+    """handle_user_input_stream() for a session turn, holding the session until it is recorded"""
+    sessions.begin_turn(session_id)
+    try:
+        try:
+            response, turn = prepare_session_turn(session_id, user_input, timings)
+        except Exception as e:
+            # Provide a graceful fallback in case of errors
+            print(f"Error processing input: {e}")
+            tracer.increment("errors_total", "turn")
+            yield ERROR_RESPONSE
+            return
+        if response is not None:
+            yield response
+            return
+
+        session, prompt, _ = turn
+        pieces = []
+        for piece in generate_stream(prompt, state=sessions.load_snapshot(session)):
+            pieces.append(piece)
+            yield piece
+        # A failure mid-stream leaves partial text before the fallback: keep neither
+        if not _stream_failed(pieces):
+            finish_session_turn(turn, "".join(pieces), snapshot=True)
+    finally:
+        sessions.end_turn(session_id)
+
+
+def handle_user_input_stream(user_input: str, timings: dict | None = None, session_id: str | None = None):
+    """
+    Process user input and stream the response as it is generated.
 
-        # Generate prompt and get response
-        prompt = generate_prompt(user_input, intent, sentiment, chunks)
-        return generate(prompt)
+    Args:
+        user_input (str): The user's message
+        timings (dict, optional): Filled with per-stage wall times in ms
+        session_id (str, optional): Answer in the context of this session's
+            earlier turns
+
+    Yields:
+        str: Pieces of the assistant's response
+    """
+    # Handle empty input gracefully
+    if not user_input or user_input.strip() == "":
+        yield EMPTY_INPUT_RESPONSE
+        return
+
+    if session_id is not None:
+        yield from _stream_session_turn(session_id, user_input, timings)
+        return
 
+    try:
+        cached, prompt, slot = prepare_turn(user_input, timings)
     except Exception as e:
         # Provide a graceful fallback in case of errors
         print(f"Error processing input: {e}")
-        return "I apologize for the inconvenience. I'm having trouble processing your request. How else can I assist you with our Mercedes-Benz vehicles?"
+        tracer.increment("errors_total", "turn")
+        yield ERROR_RESPONSE
+        return
+
+    if cached is not None:
+        yield cached
+        return
+
+    prefix, suffix = prompt
+    pieces = []
+    for piece in generate_stream(prefix + suffix, prefix=prefix):
+        pieces.append(piece)
+        yield piece
+    if not _stream_failed(pieces):
+        store_response(slot, "".join(pieces))
@@ -0,0 +1,87 @@
+# app/docstore.py
+
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# Binary docstore layout:
+#   magic (8 bytes) | n_docs (uint64) | offsets (n_docs + 1 x uint64) | records
+# Each record is the UTF-8 JSON of {"id": ..., "text": ...}; record i spans
+# records[offsets[i]:offsets[i + 1]].
+MAGIC = b"MBDOCS01"
+_HEADER = struct.Struct("<8sQ")
+
+
+def parse_metadata(text):
+    """Extract metadata from text in the format "Key: Value | Key2: Value2" """
+    metadata = {}
+    for part in text.split(" | "):
+        if ":" in part:
+            key, value = part.split(":", 1)
+            metadata[key.strip().lower()] = value.strip()
+    return metadata
+
+
+def file_fingerprint(path):
+    """Size and modification time of a file ("size:mtime_ns"), or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def write_binary_docstore(chunks, path):
+    """Write chunks to an offset-indexed binary docstore (atomically)"""
+    records = [json.dumps({"id": str(c["id"]), "text": c["text"]}).encode("utf-8")
+               for c in chunks]
+    offsets = np.zeros(len(records) + 1, dtype="<u8")
+    np.cumsum([len(r) for r in records], out=offsets[1:])
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(records)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(records))
+    os.replace(tmp_path, path)
+
+
+class MappedDocstore:
+    """
+    Read-only, memory-mapped view of a binary docstore.
+
+    Documents are decoded on access, so nothing but the offsets is touched
+    until a document is needed, and processes opening the same file share
+    its pages through the OS cache. Behaves like a list of document dicts.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_docs = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary docstore")
+
+        self._n_docs = n_docs
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=n_docs + 1,
+                                      offset=_HEADER.size)
+        self._data_start = _HEADER.size + self._offsets.nbytes
+
+    def __len__(self):
+        return self._n_docs
+
+    def __getitem__(self, pos):
+        if not 0 <= pos < self._n_docs:
+            raise IndexError(pos)
+        start = self._data_start + int(self._offsets[pos])
+        end = self._data_start + int(self._offsets[pos + 1])
+        doc = json.loads(self._mm[start:end])
+        doc["metadata"] = parse_metadata(doc["text"])
+        return doc
+
+    def __iter__(self):
+        for pos in range(self._n_docs):
+            yield self[pos]
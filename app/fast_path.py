@@ -0,0 +1,113 @@
+# app/fast_path.py
+
+import threading
+
+from app.attribute_index import PRICE_ATTRIBUTE, parse_price
+
+# Intent confidence below which a turn always goes to the LLM
+FAST_PATH_MIN_CONFIDENCE = 0.5
+
+# Fixed scripts for intents that need no generated answer
+CANNED_RESPONSES = {
+    "exit": "Thank you for considering Mercedes-Benz. Have a wonderful day!",
+    "booking": ("Certainly! You can book a showroom visit or a call with one of our sales "
+                "consultants on our website or by calling your nearest Mercedes-Benz Gargash "
+                "showroom. Which day and time would suit you?"),
+    "test_drive": ("We'd be delighted to arrange a test drive{of_model}! You can book one on our "
+                   "website or by calling your nearest Mercedes-Benz Gargash showroom; please "
+                   "bring a valid UAE driving licence. Which day and time would suit you?"),
+}
+
+PRICE_RESPONSE = ("The {model} starts at {price} (UAE Dirhams). Would you like to hear about "
+                  "current financing offers or book a test drive?")
+AVAILABILITY_RESPONSE = "The {model} is {availability}. Would you like to book a test drive?"
+# Used when the docstore has no availability field
+LINEUP_RESPONSE = ("The {model} is part of our current line-up, starting at {price} (UAE Dirhams). "
+                   "Stock and delivery times change daily, so one of our sales consultants will "
+                   "confirm what is available right now. Shall we arrange a call or a showroom visit?")
+
+# Questions that look like a price or availability question but need more
+# than one field (financing, comparisons, options)
+NEEDS_LLM_WORDS = ("financ", "monthly", "payment", "lease", "offer", "discount", "compare",
+                   " vs", "versus", "difference", "option", "colour", "color", "package")
+
+AVAILABILITY_ATTRIBUTES = ("availability", "stock")
+
+
+def format_price(value):
+    price = parse_price(value)
+    return value if price is None else f"AED {price:,.0f}"
+
+
+class FastPathResponder:
+    """
+    Deterministic answers for turns that do not need the LLM.
+
+    Canned intents (exit, booking, test drive) get a fixed script, and price
+    or availability questions about exactly one named model are answered
+    from its docstore fields. Anything ambiguous (low intent confidence, no
+    or several models named, a missing field, a question about financing or
+    options) returns None so the caller generates as usual.
+    """
+
+    def __init__(self, min_confidence=FAST_PATH_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.turns = 0
+        self.answered = {}  # intent -> turns answered without the LLM
+        self._lock = threading.Lock()
+
+    def respond(self, user_input, intent, confidence, retriever):
+        """Templated response for the turn, or None if it should go to the LLM"""
+        response = None
+        if confidence >= self.min_confidence:
+            response = self._render(user_input, intent, retriever)
+
+        with self._lock:
+            self.turns += 1
+            if response is not None:
+                self.answered[intent] = self.answered.get(intent, 0) + 1
+        return response
+
+    def _render(self, user_input, intent, retriever):
+        if intent in ("exit", "booking"):
+            return CANNED_RESPONSES[intent]
+
+        if intent not in ("test_drive", "price_inquiry", "availability"):
+            return None
+        text = user_input.lower()
+        if intent != "test_drive" and any(word in text for word in NEEDS_LLM_WORDS):
+            return None
+
+        state = retriever.snapshot()
+        positions = state.attribute_index.mentioned_models(user_input)
+        doc = state.docs[positions[0]] if len(positions) == 1 else None
+        metadata = doc["metadata"] if doc is not None else {}
+        model = metadata.get("model")
+
+        if intent == "test_drive":
+            return CANNED_RESPONSES["test_drive"].format(of_model=f" of the {model}" if model else "")
+        if model is None:
+            return None
+
+        price = metadata.get(PRICE_ATTRIBUTE)
+        if intent == "price_inquiry":
+            return PRICE_RESPONSE.format(model=model, price=format_price(price)) if price else None
+
+        for attr in AVAILABILITY_ATTRIBUTES:
+            if metadata.get(attr):
+                return AVAILABILITY_RESPONSE.format(model=model, availability=metadata[attr].lower())
+        return LINEUP_RESPONSE.format(model=model, price=format_price(price)) if price else None
+
+    def clear(self):
+        with self._lock:
+            self.turns = 0
+            self.answered.clear()
+
+    def stats(self):
+        answered = sum(self.answered.values())
+        return {
+            "turns": self.turns,
+            "answered": answered,
+            "skip_rate": answered / self.turns if self.turns else 0.0,
+            "by_intent": dict(self.answered),
+        }
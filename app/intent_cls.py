@@ -1,22 +1,42 @@
 # app/intent_cls.py
 
-from transformers import pipeline
-from typing import Dict
+import os
+import threading
+import numpy as np
+from typing import Dict, List
+
+from app.matcher import PatternMatcher
+from app.model_loading import timed_load
+from app.model_runtime import MODEL_RUNTIME, check_runtime, load_pipeline
+from app.tracing import span
+
+# Intent backend: "zero_shot" runs one BART-MNLI pass per hypothesis,
+# "embedding" scores all hypotheses with a single bge encoder pass
+INTENT_BACKEND = os.environ.get("INTENT_BACKEND", "zero_shot")
+
+# Softmax temperature applied to hypothesis cosine similarities
+EMBEDDING_TEMPERATURE = 0.05
+
+# Messages per forward pass in the batch classification methods
+BATCH_SIZE = 16
 
 
 class IntentSentimentClassifier:
-    def __init__(self):
-        # Zero-shot intent classifier
-        self.intent_model = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli"
-        )
-
-        # Sentiment classifier
-        self.sentiment_model = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
-        )
+    def __init__(self, intent_backend: str = INTENT_BACKEND, runtime: str = MODEL_RUNTIME):
+        if intent_backend not in {"zero_shot", "embedding"}:
+            raise ValueError(f"Unknown intent backend: {intent_backend}")
+        check_runtime(runtime)
+        self.intent_backend = intent_backend
+        # Runtime of the zero-shot and sentiment pipelines (see app/model_runtime.py)
+        self.runtime = runtime
+
+        # Models are loaded on first use (or by load_intent_model/load_sentiment_model)
+        self.intent_model = None
+        self.sentiment_model = None
+        self.embedding_model = None
+        self.hypothesis_embeddings = None
+        self._intent_lock = threading.Lock()
+        self._sentiment_lock = threading.Lock()
 
         # Hypotheses aligned to customer-facing assistant role
         self.hypotheses = {
@@ -41,34 +61,109 @@ class IntentSentimentClassifier:
             "after_sales": ["service", "warranty", "maintenance"],
             "exit": ["bye", "goodbye", "end", "leave"]
         }
+        # All keywords in one automaton; plain substring matches, like `k in text`
+        self.keyword_matcher = PatternMatcher(
+            ((keyword, intent) for intent, keywords in self.intent_keywords.items()
+             for keyword in keywords),
+            word_boundaries=False)
+
+    def load_intent_model(self):
+        """
+        Load the configured intent backend if it is not loaded yet.
+        """
+        with self._intent_lock:
+            if self.intent_backend == "embedding":
+                if self.hypothesis_embeddings is None:
+                    # Reuse the retrieval model and encode the hypotheses once
+                    from app.query_interface import load_model
+                    self.embedding_model = load_model()
+                    if self.embedding_model is None:
+                        raise RuntimeError("Embedding model unavailable for intent classification")
+                    self.hypothesis_embeddings = self.embedding_model.encode(
+                        list(self.hypotheses.values()), normalize_embeddings=True)
+            elif self.intent_model is None:
+                # Zero-shot intent classifier
+                with timed_load("intent"):
+                    self.intent_model = load_pipeline(
+                        "zero-shot-classification",
+                        "facebook/bart-large-mnli",
+                        self.runtime
+                    )
+
+    def load_sentiment_model(self):
+        """
+        Load the sentiment classifier if it is not loaded yet.
+        """
+        with self._sentiment_lock:
+            if self.sentiment_model is None:
+                with timed_load("sentiment"):
+                    self.sentiment_model = load_pipeline(
+                        "sentiment-analysis",
+                        "distilbert-base-uncased-finetuned-sst-2-english",
+                        self.runtime
+                    )
+
+    def _zero_shot_scores(self, texts: List[str], batch_size: int = 1) -> List[Dict[str, float]]:
+        """Score each intent with the BART-MNLI zero-shot pipeline."""
+        results = self.intent_model(texts, list(self.hypotheses.values()), batch_size=batch_size)
+
+        return [
+            {
+                key: float(score)
+                for key, hyp in self.hypotheses.items()
+                for label, score in zip(result["labels"], result["scores"])
+                if label == hyp
+            }
+            for result in results
+        ]
+
+    def _embedding_scores(self, texts: List[str], batch_size: int = 1) -> List[Dict[str, float]]:
+        """Score each intent by similarity to the pre-encoded hypotheses."""
+        vecs = self.embedding_model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        sims = vecs @ self.hypothesis_embeddings.T
+
+        # Softmax so scores sum to 1, like the zero-shot pipeline
+        exp = np.exp((sims - sims.max(axis=1, keepdims=True)) / EMBEDDING_TEMPERATURE)
+        probs = exp / exp.sum(axis=1, keepdims=True)
+        return [{key: float(p) for key, p in zip(self.hypotheses, row)} for row in probs]
 
     def classify_intent(self, text: str) -> Dict:
         """
         Classify customer intent using zero-shot classification and keyword cues.
         """
+        return self.classify_intent_batch([text])[0]
+
+    def classify_intent_batch(self, texts: List[str], batch_size: int = BATCH_SIZE) -> List[Dict]:
+        """
+        Classify the intent of several messages, `batch_size` per forward pass.
+        """
         # Handle empty input
-        if not text or text.strip() == "":
-            return {
+        results = [
+            {
                 "type": "intent",
                 "label": "exit",
                 "confidence": 1.0,
                 "all_scores": {"exit": 1.0}
-            }
-
-        result = self.intent_model(text, list(self.hypotheses.values()))
-
-        label_scores = {
-            key: float(score)
-            for key, hyp in self.hypotheses.items()
-            for label, score in zip(result["labels"], result["scores"])
-            if label == hyp
-        }
-
+            } if not text or text.strip() == "" else None
+            for text in texts
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        self.load_intent_model()
+        score_fn = self._embedding_scores if self.intent_backend == "embedding" else self._zero_shot_scores
+        with span("intent"):
+            all_scores = score_fn([texts[i] for i in pending], batch_size)
+        for i, label_scores in zip(pending, all_scores):
+            results[i] = self._label_intent(texts[i], label_scores)
+        return results
+
+    def _label_intent(self, text: str, label_scores: Dict[str, float]) -> Dict:
+        """Apply the keyword boost to the model scores and pick the top intent."""
         # Keyword reinforcement (soft boost)
-        text_lower = text.lower()
-        for intent, keywords in self.intent_keywords.items():
-            if any(k in text_lower for k in keywords):
-                label_scores[intent] = label_scores.get(intent, 0) + 0.2
+        for intent in self.keyword_matcher.values(text):
+            label_scores[intent] = label_scores.get(intent, 0) + 0.2
 
         # Determine top intent
         top_label = max(label_scores, key=label_scores.get)
@@ -85,20 +180,35 @@ class IntentSentimentClassifier:
         """
         Classify sentiment as POSITIVE or NEGATIVE.
         """
+        return self.classify_sentiment_batch([text])[0]
+
+    def classify_sentiment_batch(self, texts: List[str], batch_size: int = BATCH_SIZE) -> List[Dict]:
+        """
+        Classify the sentiment of several messages, `batch_size` per forward pass.
+        """
         # Handle empty input
-        if not text or text.strip() == "":
-            return {
+        results = [
+            {
                 "type": "sentiment",
                 "label": "NEUTRAL",
                 "score": 0.5
+            } if not text or text.strip() == "" else None
+            for text in texts
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        self.load_sentiment_model()
+        with span("sentiment"):
+            outputs = self.sentiment_model([texts[i] for i in pending], batch_size=batch_size)
+        for i, output in zip(pending, outputs):
+            results[i] = {
+                "type": "sentiment",
+                "label": output["label"],
+                "score": float(output["score"])
             }
-
-        result = self.sentiment_model(text)[0]
-        return {
-            "type": "sentiment",
-            "label": result["label"],
-            "score": float(result["score"])
-        }
+        return results
 
     def classify_all(self, text: str) -> Dict:
         """
@@ -1,7 +1,13 @@
+from collections import OrderedDict
 from pathlib import Path
 import os
+import threading
+import llama_cpp
 from llama_cpp import Llama
 
+from app.model_loading import timed_load
+from app.tracing import span, tracer
+
 # Optimize Metal performance
 os.environ["GGML_METAL_PATH_OVERRIDE"] = str(
     Path(__file__).resolve().parent.parent / "models")
@@ -10,22 +16,200 @@ os.environ["GGML_METAL_PATH_OVERRIDE"] = str(
 MODEL_PATH = Path(__file__).resolve().parent.parent / \
     "models" / "phi-2.Q4_K_M.gguf"
 
-# Initialize the LLM (Phi-2) once on import
-llm = Llama(
-    model_path=str(MODEL_PATH),
-    n_ctx=2048,           # context window size for prompt + response
-    # utilize physical CPU cores (reduced from 8 for stability)
-    n_threads=4,
-    n_gpu_layers=32,      # offload all Transformer layers to Apple Metal
-    # batch size for token generation (reduced from 128 for stability)
-    n_batch=64
-)
+# Runtime settings, overridable per process through the environment
+N_CTX = 2048
+# utilize physical CPU cores (reduced from 8 for stability)
+N_THREADS = int(os.environ.get("LLM_THREADS", 4))
+# offload all Transformer layers to Apple Metal (set to 0 for CPU only)
+N_GPU_LAYERS = int(os.environ.get("LLM_GPU_LAYERS", 32))
+# batch size for token generation (reduced from 128 for stability)
+N_BATCH = int(os.environ.get("LLM_BATCH", 64))
+
+# Speculative decoding: "prompt_lookup" drafts tokens by matching the last
+# n-gram of the context against earlier text in the prompt (the retrieved
+# chunks), which pays off when answers quote model names and prices verbatim
+LLM_DRAFT = os.environ.get("LLM_DRAFT", "none")
+# Tokens drafted per step and longest n-gram matched against the prompt
+LLM_DRAFT_TOKENS = int(os.environ.get("LLM_DRAFT_TOKENS", 10))
+LLM_DRAFT_NGRAM = int(os.environ.get("LLM_DRAFT_NGRAM", 2))
+
+# The LLM (Phi-2) is loaded on first use
+llm = None
+_llm_lock = threading.Lock()
+# The prompt-lookup draft model when LLM_DRAFT is enabled
+draft_model = None
+
+
+def make_draft_model(mode=None, draft_tokens=None, ngram=None):
+    """
+    Draft model for llama.cpp speculative decoding, or None when disabled.
+
+    The returned drafter counts its steps and drafted tokens (see
+    draft_stats()).
+    """
+    mode = LLM_DRAFT if mode is None else mode
+    if mode == "none":
+        return None
+    if mode != "prompt_lookup":
+        raise ValueError(f"Unknown draft mode: {mode} (expected 'none' or 'prompt_lookup')")
+
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+    class CountingPromptLookup(LlamaPromptLookupDecoding):
+        """Prompt-lookup drafter that keeps count of what it proposed"""
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.steps = 0
+            self.drafted = 0
+
+        def __call__(self, input_ids, **kwargs):
+            draft = super().__call__(input_ids, **kwargs)
+            self.steps += 1
+            self.drafted += len(draft)
+            return draft
+
+    return CountingPromptLookup(
+        num_pred_tokens=LLM_DRAFT_TOKENS if draft_tokens is None else draft_tokens,
+        max_ngram_size=LLM_DRAFT_NGRAM if ngram is None else ngram)
+
+
+def draft_stats():
+    """
+    Decoding steps and drafted tokens so far, or None without a draft model.
+
+    Every step emits one sampled token plus the accepted draft tokens, so
+    for n generated tokens the accepted drafts are n - steps.
+    """
+    if draft_model is None:
+        return None
+    return {"steps": draft_model.steps, "drafted": draft_model.drafted}
+
+
+def load_llm():
+    """Load the LLM (Phi-2) once, on first use"""
+    global llm, draft_model
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                with timed_load("llm"):
+                    draft_model = make_draft_model()
+                    llm = Llama(
+                        model_path=str(MODEL_PATH),
+                        n_ctx=N_CTX,          # context window size for prompt + response
+                        n_threads=N_THREADS,
+                        n_gpu_layers=N_GPU_LAYERS,
+                        n_batch=N_BATCH,
+                        draft_model=draft_model
+                    )
+    return llm
+
+
+# Stop generation at these markers
+STOP_SEQUENCES = ["User:", "User message:", "🧑 You:"]
+
+FALLBACK_RESPONSE = "I apologize, but I'm having trouble generating a response. How else can I assist you?"
+
+# Number of evaluated prompt prefixes (one per intent template) whose
+# llama.cpp state is kept in memory; 0 disables prefix caching
+PREFIX_CACHE_SIZE = 9
+
+_prefix_states = OrderedDict()
+
+
+def restore_prefix(prefix: str) -> None:
+    """
+    Put the model in the state it has right after evaluating `prefix`.
+
+    The first time a prefix is seen it is evaluated and its state saved;
+    afterwards the saved state is loaded instead. llama.cpp then only has
+    to prefill the part of the next prompt that follows the prefix.
+    """
+    llm = load_llm()
+    state = _prefix_states.get(prefix)
+    if state is not None:
+        _prefix_states.move_to_end(prefix)
+        llm.load_state(state)
+        return
+
+    llm.reset()
+    llm.eval(llm.tokenize(prefix.encode("utf-8"), special=True))
+    _prefix_states[prefix] = llm.save_state()
+    while len(_prefix_states) > PREFIX_CACHE_SIZE:
+        _prefix_states.popitem(last=False)
+
+
+def save_state():
+    """Snapshot of the model state (KV cache and evaluated tokens) for generate(state=...)"""
+    return load_llm().save_state()
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens `text` takes up in a prompt"""
+    return len(load_llm().tokenize(text.encode("utf-8"), add_bos=False, special=True))
+
+
+def _prepare(prompt: str, prefix: str, state=None) -> None:
+    if state is not None:
+        with span("session_restore"):
+            load_llm().load_state(state)
+    elif prefix and PREFIX_CACHE_SIZE > 0 and prompt.startswith(prefix):
+        with span("prefix_restore"):
+            restore_prefix(prefix)
+    if tracer.enabled:
+        _reset_llama_timings(load_llm())
+
+
+def _reset_llama_timings(llm) -> None:
+    if hasattr(llama_cpp, "llama_perf_context_reset"):
+        llama_cpp.llama_perf_context_reset(llm.ctx)
+    elif hasattr(llama_cpp, "llama_reset_timings"):
+        llama_cpp.llama_reset_timings(llm.ctx)
+
+
+def llama_timings(llm):
+    """
+    llama.cpp's prefill/decode counters since the last reset, or None.
+
+    Returns:
+        dict: prefill_ms, prefill_tokens, decode_ms and decode_tokens
+    """
+    if hasattr(llama_cpp, "llama_perf_context"):
+        timings = llama_cpp.llama_perf_context(llm.ctx)
+    elif hasattr(llama_cpp, "llama_get_timings"):
+        timings = llama_cpp.llama_get_timings(llm.ctx)
+    else:
+        return None
+    return {
+        "prefill_ms": timings.t_p_eval_ms,
+        "prefill_tokens": timings.n_p_eval,
+        "decode_ms": timings.t_eval_ms,
+        "decode_tokens": timings.n_eval,
+    }
+
+
+def _record_llama_timings(llm) -> None:
+    """Record prefill and decode time, tokens and tokens/sec from llama.cpp's counters"""
+    if not tracer.enabled:
+        return
+    timings = llama_timings(llm)
+    if timings is None:
+        return
+
+    for phase in ("prefill", "decode"):
+        ms, n_tokens = timings[f"{phase}_ms"], timings[f"{phase}_tokens"]
+        tracer.record(phase, ms)
+        tracer.observe("llm_tokens", phase, n_tokens)
+        if ms > 0:
+            tracer.observe("llm_tokens_per_second", phase, n_tokens * 1000 / ms)
 
 
 def generate(prompt: str,
              max_tokens: int = 256,
              temperature: float = 0.7,
-             top_p: float = 0.9) -> str:
+             top_p: float = 0.9,
+             prefix: str = "",
+             state=None) -> str:
     """
     Generate a response using the local Phi-2 model.
 
@@ -34,21 +218,72 @@ def generate(prompt: str,
         max_tokens (int): Maximum number of tokens to generate.
         temperature (float): Sampling temperature (higher = more creative).
         top_p (float): Cumulative probability for nucleus sampling.
+        prefix (str): Leading part of `prompt` shared across turns; its
+            evaluated state is cached and restored before generation.
+        state (optional): Snapshot from save_state() of an earlier prompt
+            that `prompt` extends; loaded instead of the prefix state so
+            only the rest of `prompt` is prefilled.
 
     Returns:
         str: The generated text (stripped of leading/trailing whitespace).
     """
     try:
+        llm = load_llm()
+        _prepare(prompt, prefix, state)
         result = llm(
             prompt,
             max_tokens=max_tokens,
             temperature=temperature,
             top_p=top_p,
-            # Stop generation at these markers
-            stop=["User:", "User message:", "🧑 You:"]
+            stop=STOP_SEQUENCES
         )
+        _record_llama_timings(llm)
         # The `choices` list contains the outputs; we take the first one
         return result["choices"][0]["text"].strip()
     except Exception as e:
         print(f"Error generating response: {e}")
-        return "I apologize, but I'm having trouble generating a response. How else can I assist you?"
+        tracer.increment("errors_total", "generate")
+        return FALLBACK_RESPONSE
+
+
+def generate_stream(prompt: str,
+                    max_tokens: int = 256,
+                    temperature: float = 0.7,
+                    top_p: float = 0.9,
+                    prefix: str = "",
+                    state=None):
+    """
+    Stream a response from the local Phi-2 model token by token.
+
+    Takes the same arguments as `generate`.
+
+    Yields:
+        str: Pieces of generated text as soon as llama.cpp produces them
+             (leading whitespace of the response is dropped). If generation
+             fails, FALLBACK_RESPONSE is yielded as the last piece, possibly
+             after partial text; callers should not store such a response.
+    """
+    try:
+        llm = load_llm()
+        _prepare(prompt, prefix, state)
+        started = False
+        for chunk in llm(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=STOP_SEQUENCES,
+            stream=True
+        ):
+            text = chunk["choices"][0]["text"]
+            if not started:
+                text = text.lstrip()
+                if not text:
+                    continue
+                started = True
+            yield text
+        _record_llama_timings(llm)
+    except Exception as e:
+        print(f"Error generating response: {e}")
+        tracer.increment("errors_total", "generate")
+        yield FALLBACK_RESPONSE
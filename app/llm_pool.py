@@ -0,0 +1,194 @@
+# app/llm_pool.py
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+# Number of llama.cpp worker processes and threads given to each (None:
+# the cores split evenly between the workers of the pool)
+LLM_WORKERS = int(os.environ.get("LLM_WORKERS", 1))
+LLM_THREADS_PER_WORKER = (int(os.environ["LLM_THREADS_PER_WORKER"])
+                          if "LLM_THREADS_PER_WORKER" in os.environ else None)
+# How often (seconds) the pool checks for worker processes that died
+WORKER_CHECK_INTERVAL = 1.0
+
+
+def _worker_main(worker_id, n_threads, n_gpu_layers, requests, responses):
+    """
+    Entry point of a worker process.
+
+    Each worker loads its own Llama instance through app.llm_backend. The
+    GGUF file is memory-mapped, so the weights are shared between workers
+    through the OS page cache.
+    """
+    os.environ["LLM_THREADS"] = str(n_threads)
+    os.environ["LLM_GPU_LAYERS"] = str(n_gpu_layers)
+    try:
+        from app import llm_backend
+        llm_backend.load_llm()
+    except Exception as e:
+        responses.put(("failed", worker_id, str(e)))
+        return
+
+    responses.put(("ready", worker_id, None))
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        job_id, prompt, kwargs = job
+        try:
+            responses.put(("done", job_id, llm_backend.generate(prompt, **kwargs)))
+        except Exception as e:
+            responses.put(("error", job_id, str(e)))
+
+
+class LLMPool:
+    """
+    Pool of llama.cpp worker processes.
+
+    Prompts are routed to the live worker with the fewest outstanding jobs
+    and results come back as concurrent.futures.Future objects. If a worker
+    process dies, its outstanding futures fail and it gets no more jobs.
+    """
+
+    def __init__(self, n_workers=LLM_WORKERS, threads_per_worker=LLM_THREADS_PER_WORKER,
+                 n_gpu_layers=0):
+        if threads_per_worker is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker
+        self.n_gpu_layers = n_gpu_layers
+
+        self._ctx = mp.get_context("spawn")
+        self._responses = self._ctx.Queue()
+        self._requests = []
+        self._processes = []
+        self._pending = [0] * n_workers
+        self._alive = [True] * n_workers
+        self._futures = {}
+        self._job_worker = {}
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = None
+
+    def start(self):
+        """Start the workers and wait until every model is loaded"""
+        for worker_id in range(self.n_workers):
+            requests = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.threads_per_worker, self.n_gpu_layers,
+                      requests, self._responses),
+                daemon=True)
+            process.start()
+            self._requests.append(requests)
+            self._processes.append(process)
+
+        ready = set()
+        while len(ready) < self.n_workers:
+            try:
+                kind, worker_id, payload = self._responses.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                # A worker killed while loading (e.g. out of memory) never reports
+                for worker_id, process in enumerate(self._processes):
+                    if worker_id not in ready and not process.is_alive():
+                        self.close()
+                        raise RuntimeError(f"LLM worker {worker_id} exited with code "
+                                           f"{process.exitcode} before it was ready")
+                continue
+            if kind == "failed":
+                self.close()
+                raise RuntimeError(f"LLM worker {worker_id} failed to start: {payload}")
+            ready.add(worker_id)
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        return self
+
+    def _collect(self):
+        """Resolve futures as results arrive from the workers"""
+        while True:
+            try:
+                kind, job_id, payload = self._responses.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if kind == "stop":
+                break
+            with self._lock:
+                future = self._futures.pop(job_id, None)
+                worker_id = self._job_worker.pop(job_id, None)
+                if worker_id is not None:
+                    self._pending[worker_id] -= 1
+            if future is None:
+                continue
+            if kind == "done":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+            self._check_workers()
+
+    def _check_workers(self):
+        """Fail the outstanding jobs of workers that exited and stop routing to them"""
+        failed = []
+        with self._lock:
+            for worker_id, process in enumerate(self._processes):
+                if not self._alive[worker_id] or process.exitcode is None:
+                    continue
+                self._alive[worker_id] = False
+                self._pending[worker_id] = 0
+                error = RuntimeError(f"LLM worker {worker_id} exited with code {process.exitcode}")
+                for job_id in [j for j, w in self._job_worker.items() if w == worker_id]:
+                    del self._job_worker[job_id]
+                    failed.append((self._futures.pop(job_id), error))
+        for future, error in failed:
+            future.set_exception(error)
+
+    @property
+    def alive(self):
+        """Number of worker processes still running"""
+        with self._lock:
+            return sum(self._alive)
+
+    @property
+    def pending(self):
+        """Outstanding jobs per worker"""
+        with self._lock:
+            return list(self._pending)
+
+    def submit(self, prompt, **kwargs):
+        """Send a prompt to the least-loaded worker and return a Future for the text"""
+        future = Future()
+        with self._lock:
+            live = [i for i in range(self.n_workers) if self._alive[i]]
+            if not live:
+                raise RuntimeError("No LLM workers are running")
+            worker_id = min(live, key=self._pending.__getitem__)
+            job_id = next(self._job_ids)
+            self._pending[worker_id] += 1
+            self._futures[job_id] = future
+            self._job_worker[job_id] = worker_id
+        self._requests[worker_id].put((job_id, prompt, kwargs))
+        return future
+
+    def generate(self, prompt, **kwargs):
+        """Blocking equivalent of llm_backend.generate"""
+        return self.submit(prompt, **kwargs).result()
+
+    def close(self):
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+        if self._collector is not None:
+            self._responses.put(("stop", None, None))
+            self._collector.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,100 @@
+# app/matcher.py
+
+from collections import deque
+
+
+class PatternMatcher:
+    """
+    Aho–Corasick automaton over a fixed set of case-insensitive patterns.
+
+    Built once from (pattern, value) pairs, it finds every occurrence of
+    every pattern in a text in a single pass over its characters, however
+    many patterns there are. Several values may share a pattern. With
+    `word_boundaries`, matches that start or end inside a word are dropped.
+    """
+
+    def __init__(self, patterns, word_boundaries=True):
+        self.word_boundaries = word_boundaries
+        self._goto = [{}]      # state -> {char: next state}
+        self._fail = [0]
+        self._outputs = [[]]   # state -> [(pattern length, value)]
+
+        for pattern, value in patterns:
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((len(pattern), value))
+
+        # Failure links, breadth first, so each state also reports the
+        # patterns ending at its longest proper suffix state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def __len__(self):
+        return sum(len(outputs) for outputs in self._outputs)
+
+    def find_all(self, text):
+        """
+        Every (start, end, value) occurrence in `text`, overlapping ones included.
+
+        Returns:
+            list: Matches ordered by end position
+        """
+        text = text.lower()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in outputs[state]:
+                start, end = i + 1 - length, i + 1
+                if self.word_boundaries and (
+                        (start > 0 and text[start - 1].isalnum())
+                        or (end < len(text) and text[end].isalnum())):
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+    def find(self, text):
+        """
+        Leftmost-longest, non-overlapping matches in `text`.
+
+        A pattern inside a longer match ("GLE 450" in "GLE 450 Coupe") is
+        not reported; values sharing the matched pattern all are.
+
+        Returns:
+            list: (start, end, value) ordered by position
+        """
+        selected = []
+        last_end = 0
+        for start, end, value in sorted(self.find_all(text), key=lambda m: (m[0], -m[1])):
+            if selected and start == selected[-1][0] and end == selected[-1][1]:
+                selected.append((start, end, value))
+            elif start >= last_end:
+                selected.append((start, end, value))
+                last_end = end
+        return selected
+
+    def values(self, text):
+        """Distinct values of every (overlapping) match in `text`, in order of appearance"""
+        return list(dict.fromkeys(value for _, _, value in self.find_all(text)))
@@ -0,0 +1,15 @@
+# app/model_loading.py
+
+import time
+from contextlib import contextmanager
+
+# Seconds each model took to load, filled in as models are loaded
+load_times = {}
+
+
+@contextmanager
+def timed_load(name):
+    """Record how long the wrapped model load takes under `name`"""
+    start = time.perf_counter()
+    yield
+    load_times[name] = time.perf_counter() - start
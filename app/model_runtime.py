@@ -0,0 +1,99 @@
+# app/model_runtime.py
+
+import os
+import re
+from pathlib import Path
+
+import torch
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer, pipeline
+
+# Runtime for the classifier and embedding models:
+#   "torch"      fp32 PyTorch (default)
+#   "int8"       PyTorch with dynamically quantized int8 Linear layers
+#   "onnx"       ONNX Runtime on an exported fp32 graph
+#   "onnx_int8"  ONNX Runtime on a dynamically quantized int8 graph
+MODEL_RUNTIMES = ("torch", "int8", "onnx", "onnx_int8")
+MODEL_RUNTIME = os.environ.get("MODEL_RUNTIME", "torch")
+
+# ONNX exports are written once and reused on later loads
+BASE_DIR = Path(__file__).resolve().parent.parent
+ONNX_CACHE_DIR = BASE_DIR / "models" / "onnx"
+
+
+def check_runtime(runtime):
+    if runtime not in MODEL_RUNTIMES:
+        raise ValueError(f"Unknown model runtime: {runtime} (expected one of {MODEL_RUNTIMES})")
+
+
+def _export_dir(model_name, runtime):
+    slug = re.sub(r"[^\w.-]+", "--", model_name)
+    return ONNX_CACHE_DIR / f"{slug}-{runtime}"
+
+
+def _quantize_dynamic(model):
+    """Swap Linear layers for int8 dynamically quantized ones, in place"""
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _load_ort_classifier(model_name, runtime):
+    """ONNX Runtime sequence classifier and tokenizer, exported on first use"""
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError:
+        raise ImportError("The ONNX runtimes need optimum. "
+                          "Please install with: pip install optimum[onnxruntime]")
+
+    export_dir = _export_dir(model_name, runtime)
+    file_name = "model_quantized.onnx" if runtime == "onnx_int8" else "model.onnx"
+    if not (export_dir / file_name).exists():
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if runtime == "onnx_int8":
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+        else:
+            model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+
+    model = ORTModelForSequenceClassification.from_pretrained(export_dir, file_name=file_name)
+    return model, AutoTokenizer.from_pretrained(export_dir)
+
+
+def load_pipeline(task, model_name, runtime=MODEL_RUNTIME):
+    """transformers pipeline for `task` running on the given runtime"""
+    check_runtime(runtime)
+    if runtime in ("onnx", "onnx_int8"):
+        model, tokenizer = _load_ort_classifier(model_name, runtime)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
+    pipe = pipeline(task, model=model_name)
+    if runtime == "int8":
+        _quantize_dynamic(pipe.model)
+    return pipe
+
+
+def load_sentence_transformer(model_name, runtime=MODEL_RUNTIME):
+    """SentenceTransformer running on the given runtime"""
+    check_runtime(runtime)
+    if runtime == "torch":
+        return SentenceTransformer(model_name)
+    if runtime == "int8":
+        return _quantize_dynamic(SentenceTransformer(model_name, device="cpu"))
+    if runtime == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+
+    # onnx_int8: save the model with a quantized graph next to it, once
+    export_dir = _export_dir(model_name, runtime)
+    file_name = "onnx/model_qint8_avx2.onnx"
+    if not (export_dir / file_name).exists():
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(str(export_dir))
+        export_dynamic_quantized_onnx_model(model, "avx2", str(export_dir))
+    return SentenceTransformer(str(export_dir), backend="onnx",
+                               model_kwargs={"file_name": file_name})
@@ -5,6 +5,9 @@ import numpy as np
 import json
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -17,29 +20,152 @@ except ImportError:
     print("Please install with: pip install sentence-transformers")
     sys.exit(1)
 
+from app.attribute_index import AttributeIndex
+from app.bm25 import BM25Index
+from app.docstore import MappedDocstore, file_fingerprint, parse_metadata
+from app.model_loading import timed_load
+from app.model_runtime import load_sentence_transformer
+from app.tracing import span
+
 # Use absolute paths based on the project root
 BASE_DIR = Path(__file__).resolve().parent.parent
 FAISS_INDEX_PATH = BASE_DIR / "data" / "faiss" / "index.bin"
 ID_MAP_PATH = BASE_DIR / "data" / "faiss" / "id_map.json"
+INDEX_CONFIG_PATH = BASE_DIR / "data" / "faiss" / "index_config.json"
+# Fingerprints of the index and JSON id map embed_chunks wrote together
+INDEX_MANIFEST_PATH = BASE_DIR / "data" / "faiss" / "index_manifest.json"
 DOCSTORE_PATH = BASE_DIR / "data" / "raw" / "docstore.jsonl"
+# Memory-mapped layout written by embed_chunks (see app/docstore.py)
+DOCSTORE_BIN_PATH = BASE_DIR / "data" / "raw" / "docstore.bin"
+FAISS_ROWS_PATH = BASE_DIR / "data" / "faiss" / "faiss_rows.npy"
+# BM25 inverted index over the docstore rows, written by embed_chunks
+BM25_INDEX_PATH = BASE_DIR / "data" / "faiss" / "bm25.npz"
+# Saved AttributeIndex, so a mapped docstore is not decoded in full on the first query
+ATTRIBUTE_INDEX_PATH = BASE_DIR / "data" / "raw" / "attribute_index.npz"
 MODEL_NAME = "BAAI/bge-base-en-v1.5"
 
+# Open the index and docstore memory-mapped, so serving processes share pages
+RETRIEVER_MMAP = os.environ.get("RETRIEVER_MMAP", "0") == "1"
+# "vector" (FAISS), "bm25" (keywords) or "hybrid" (both, fused by reciprocal rank)
+SEARCH_MODES = ("vector", "bm25", "hybrid")
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "vector")
+# Results taken from each list before fusing, and the RRF rank constant
+HYBRID_DEPTH = 20
+RRF_K = 60
+
+# Answer queries that name specific models with those documents, skipping
+# the embedding and FAISS search
+DIRECT_MODEL_FETCH = True
+# Zero-copy read flags (IO_FLAG_MMAP_IFC maps flat codes in place on newer FAISS)
+FAISS_MMAP_FLAGS = (faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                    | getattr(faiss, "IO_FLAG_MMAP_IFC", 0))
+
+# Query embedding cache settings
+EMBEDDING_CACHE_SIZE = 1024
+EMBEDDING_CACHE_TTL = 3600  # seconds
+
 # Initialize model
 model = None
+_model_lock = threading.Lock()
 
 
 def load_model():
-    """Load the sentence transformer model"""
+    """Load the sentence transformer model on the configured runtime (MODEL_RUNTIME)"""
     global model
     if model is None:
-        try:
-            model = SentenceTransformer(MODEL_NAME)
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return None
+        with _model_lock:
+            if model is None:
+                try:
+                    with timed_load("embedding"):
+                        model = load_sentence_transformer(MODEL_NAME)
+                except Exception as e:
+                    print(f"Error loading model: {e}")
+                    return None
     return model
 
 
+def normalize_query(query):
+    """Normalize query text so trivially different phrasings share a cache key"""
+    return " ".join(query.lower().split())
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of query embeddings with a time-to-live"""
+
+    def __init__(self, max_size=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+embedding_cache = EmbeddingCache()
+
+
+def encode_queries(queries):
+    """
+    Encode queries, reusing cached embeddings and batching the rest
+
+    Args:
+        queries (list[str]): The queries to encode
+
+    Returns:
+        np.ndarray: One embedding row per query, or None if the model is unavailable
+    """
+    keys = [normalize_query(q) for q in queries]
+    vectors = [embedding_cache.get(k) for k in keys]
+
+    # Encode each distinct uncached query once, in a single batch
+    missing = list(dict.fromkeys(k for k, v in zip(keys, vectors) if v is None))
+    if missing:
+        model = load_model()
+        if model is None:
+            return None
+        with span("embedding"):
+            encoded = dict(zip(missing, model.encode(missing)))
+        for key, vector in encoded.items():
+            embedding_cache.put(key, vector)
+        vectors = [encoded[k] if v is None else v for k, v in zip(keys, vectors)]
+
+    return np.array(vectors, dtype=np.float32)
+
+
 def ensure_index_exists():
     """Ensure the FAISS index is initialized before querying"""
     if not FAISS_INDEX_PATH.exists() or not ID_MAP_PATH.exists():
@@ -55,158 +181,665 @@ def ensure_index_exists():
     return True
 
 
-def load_docstore():
+def load_docstore(docstore_path=DOCSTORE_PATH):
     """Load the document store with extracted metadata"""
-    if not DOCSTORE_PATH.exists():
+    if not Path(docstore_path).exists():
         return {}
 
     docstore = {}
-    with open(DOCSTORE_PATH) as f:
+    with open(docstore_path) as f:
         for line in f:
             doc = json.loads(line)
 
-            # Extract metadata from text format "Key: Value | Key2: Value2"
-            metadata = {}
-            if "text" in doc:
-                text_parts = doc["text"].split(" | ")
-                for part in text_parts:
-                    if ":" in part:
-                        key, value = part.split(":", 1)
-                        metadata[key.strip().lower()] = value.strip()
-
             # Add metadata to doc
-            doc["metadata"] = metadata
+            doc["metadata"] = parse_metadata(doc["text"]) if "text" in doc else {}
             docstore[doc['id']] = doc
 
     return docstore
 
 
 def fallback_search(query, top_k=3):
-    """Simple keyword-based search as fallback"""
-    if not DOCSTORE_PATH.exists():
-        return ["No data found. Please run setup.py first."]
+    """BM25 keyword search, used when vector search is unavailable"""
+    try:
+        return get_retriever().keyword_search(query, top_k)
+    except Exception as e:
+        print(f"Error during keyword search: {e}")
+        return []
 
-    # Load docstore
-    documents = []
-    with open(DOCSTORE_PATH) as f:
-        for line in f:
-            documents.append(json.loads(line))
 
-    # Simple keyword matching
-    query_terms = query.lower().split()
-    results = []
+def reciprocal_rank_fusion(result_lists, top_k=5, k=RRF_K):
+    """
+    Merge ranked document lists by reciprocal rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the lists it appears in,
+    so documents ranked well by several retrievers come first without
+    having to calibrate their scores against each other.
+    """
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            scores[doc["id"]] = scores.get(doc["id"], 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc["id"], doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [docs[doc_id] for doc_id in ranked]
 
-    for doc in documents:
-        text = doc["text"].lower()
-        score = sum(1 for term in query_terms if term in text)
-        if score > 0:
-            results.append((doc, score))
 
-    # Sort by score
-    results.sort(key=lambda x: x[1], reverse=True)
-    return [r[0] for r in results[:top_k]]
+def load_index_config(path=INDEX_CONFIG_PATH):
+    """Load the index config written by embed_chunks (flat index if there is none)"""
+    if not Path(path).exists():
+        return {"type": "flat"}
+    with open(path) as f:
+        return json.load(f)
 
 
-def search(query, top_k=5, return_metadata=False):
+def _mtime(path):
+    """Return the modification time of a file, or None if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class RetrieverState:
     """
-    Search for the most relevant documents
+    One generation of the loaded docstore, index and id map.
 
-    Args:
-        query (str): The search query
-        top_k (int): Number of results to return
-        return_metadata (bool): If True, return full document objects including metadata
+    Retriever.refresh() builds a new state and publishes it with a single
+    assignment, so a search that reads `retriever.state` once never pairs
+    the docs of one generation with the index or id map of another.
+    Structures derived from them (attribute index, BM25, doc rows) are
+    cached on the state they were built from.
+    """
 
-    Returns:
-        list: Either list of strings (texts) or list of dicts (full documents)
+    def __init__(self, docs=(), index=None, id_map=None, search_params=None,
+                 docstore_mtime=None, index_mtimes=None, bm25_mtime=None,
+                 docstore_path=None, docstore_fingerprint=None, bm25_path=None,
+                 attribute_index_path=None):
+        self.docs = docs
+        self.index = index
+        # FAISS row -> position in self.docs (-1 when the document is missing)
+        self.id_map = np.empty(0, dtype=np.int64) if id_map is None else id_map
+        self.search_params = search_params or {}
+        self.docstore_mtime = docstore_mtime
+        self.index_mtimes = index_mtimes
+        self.bm25_mtime = bm25_mtime
+        self.docstore_path = docstore_path
+        self.docstore_fingerprint = docstore_fingerprint
+        self.bm25_path = bm25_path
+        self.attribute_index_path = attribute_index_path
+        self._attribute_index = None
+        self._bm25 = None
+        self._doc_rows = None
+
+    @property
+    def version(self):
+        """Modification times of the docstore, index and BM25 files this state was loaded from"""
+        return self.docstore_mtime, self.index_mtimes, self.bm25_mtime
+
+    def _matches_docstore(self, saved):
+        """Whether a saved BM25 or attribute index was built from the loaded docstore"""
+        return (saved.n_docs == len(self.docs)
+                and saved.sources.get(self.docstore_path.name) == self.docstore_fingerprint)
+
+    @property
+    def attribute_index(self):
+        """
+        Attribute index over the docstore, loaded on first use.
+
+        Built from the documents if the saved index is missing or was
+        written for a different docstore.
+        """
+        index = self._attribute_index
+        if index is None:
+            if self.attribute_index_path is not None and self.attribute_index_path.exists():
+                try:
+                    index = AttributeIndex.load(self.attribute_index_path)
+                except ValueError:
+                    index = None
+            if index is None or not self._matches_docstore(index):
+                index = AttributeIndex(self.docs)
+            self._attribute_index = index
+        return index
+
+    @property
+    def bm25(self):
+        """
+        BM25 index over the docstore, loaded on first use.
+
+        Built in memory if the saved index is missing or was written for a
+        different docstore (its recorded fingerprint of the docstore file
+        does not match the one that was loaded).
+        """
+        bm25 = self._bm25
+        if bm25 is None:
+            if self.bm25_mtime is not None:
+                bm25 = BM25Index.load(self.bm25_path)
+            if bm25 is None or not self._matches_docstore(bm25):
+                bm25 = BM25Index.build(doc["text"] for doc in self.docs)
+            self._bm25 = bm25
+        return bm25
+
+    @property
+    def doc_rows(self):
+        """Position in self.docs -> FAISS row (-1 when not indexed), built on first use"""
+        doc_rows = self._doc_rows
+        if doc_rows is None:
+            id_map = np.asarray(self.id_map)
+            doc_rows = np.full(len(self.docs), -1, dtype=np.int64)
+            indexed = np.flatnonzero((id_map >= 0) & (id_map < len(doc_rows)))
+            doc_rows[id_map[indexed]] = indexed
+            self._doc_rows = doc_rows
+        return doc_rows
+
+    def filtered_search_params(self, selector):
+        """SearchParameters restricting a search to `selector`, keeping the tuning"""
+        if "efSearch" in self.search_params:
+            return faiss.SearchParametersHNSW(sel=selector, **self.search_params)
+        if "nprobe" in self.search_params:
+            return faiss.SearchParametersIVF(sel=selector, **self.search_params)
+        return faiss.SearchParameters(sel=selector)
+
+
+class Retriever:
     """
-    try:
-        # Check if index exists
-        if not ensure_index_exists():
-            results = fallback_search(query, top_k)
-            return results if return_metadata else [r["text"] for r in results]
+    Long-lived retrieval engine.
 
-        # Load model
-        model = load_model()
-        if model is None:
-            results = fallback_search(query, top_k)
-            return results if return_metadata else [r["text"] for r in results]
+    Loads the FAISS index, the id map and the parsed docstore once and serves
+    queries from memory. File modification times are checked on every call so
+    a rebuilt index or docstore is picked up without restarting the process.
 
-        # Load index
-        index = faiss.read_index(str(FAISS_INDEX_PATH))
+    With mmap=True the index is opened memory-mapped, the id map is the
+    faiss_rows.npy array and the docstore is the binary docstore.bin, so
+    documents are only decoded when they are returned. Until embed_chunks
+    has written those two files, the JSONL docstore and JSON id map next
+    to them are read instead.
+    """
 
-        # Load ID map
-        with open(ID_MAP_PATH) as f:
-            id_map = json.load(f)
+    def __init__(self, index_path=FAISS_INDEX_PATH, id_map_path=None,
+                 docstore_path=None, config_path=INDEX_CONFIG_PATH, mmap=False,
+                 bm25_path=BM25_INDEX_PATH, attribute_index_path=ATTRIBUTE_INDEX_PATH):
+        self.mmap = mmap
+        if id_map_path is None:
+            id_map_path = FAISS_ROWS_PATH if mmap else ID_MAP_PATH
+        if docstore_path is None:
+            docstore_path = DOCSTORE_BIN_PATH if mmap else DOCSTORE_PATH
+        self.index_path = Path(index_path)
+        self.id_map_path = Path(id_map_path)
+        self.docstore_path = Path(docstore_path)
+        self.config_path = Path(config_path)
+        self.bm25_path = Path(bm25_path)
+        self.attribute_index_path = Path(attribute_index_path)
+
+        # Replaced, never mutated, by refresh()
+        self.state = RetrieverState(docs=[], docstore_path=self.docstore_path,
+                                    bm25_path=self.bm25_path,
+                                    attribute_index_path=self.attribute_index_path)
+        self.index_config = {"type": "flat"}
+        self._config_mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def docs(self):
+        return self.state.docs
+
+    @property
+    def index(self):
+        return self.state.index
+
+    @property
+    def id_map(self):
+        return self.state.id_map
+
+    @property
+    def version(self):
+        """Modification times of the loaded docstore, index and BM25 files"""
+        return self.state.version
+
+    @property
+    def attribute_index(self):
+        return self.state.attribute_index
+
+    @property
+    def bm25(self):
+        return self.state.bm25
+
+    @property
+    def doc_rows(self):
+        return self.state.doc_rows
+
+    def _files(self):
+        """The docstore and id map to load (see the JSON fallback of mmap mode)"""
+        docstore_path, id_map_path = self.docstore_path, self.id_map_path
+        if self.mmap and not docstore_path.exists():
+            docstore_path = docstore_path.with_suffix(".jsonl")
+        if self.mmap and not id_map_path.exists():
+            id_map_path = id_map_path.with_name(ID_MAP_PATH.name)
+        return docstore_path, id_map_path
+
+    def _read_docstore(self, docstore_path):
+        if docstore_path == self.docstore_path and self.mmap:
+            return MappedDocstore(docstore_path)
+        if docstore_path != self.docstore_path and docstore_path.exists():
+            print(f"{self.docstore_path} not found, reading {docstore_path} instead "
+                  f"(run scripts/embed_chunks.py to write it)")
+        return list(load_docstore(docstore_path).values())
+
+    def _read_index(self, index_mtimes, docs, id_map_path):
+        """The FAISS index and id map, with row positions resolved against `docs`"""
+        if None in index_mtimes:
+            return None, np.empty(0, dtype=np.int64)
+        if self.mmap:
+            index = faiss.read_index(str(self.index_path), FAISS_MMAP_FLAGS)
+        else:
+            index = faiss.read_index(str(self.index_path))
+        if id_map_path.suffix == ".npy":
+            return index, np.load(id_map_path, mmap_mode="r")
+        with open(id_map_path) as f:
+            raw_map = json.load(f)
+        return index, self._build_id_map(raw_map, index, docs)
+
+    def _apply_index_config(self, index):
+        """Apply the persisted search-time parameters (nprobe, efSearch) to the index"""
+        if index is None:
+            return {}
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            index = faiss.downcast_index(index.index)
+
+        if isinstance(index, faiss.IndexHNSW) and "ef_search" in self.index_config:
+            index.hnsw.efSearch = self.index_config["ef_search"]
+            return {"efSearch": self.index_config["ef_search"]}
+        if isinstance(index, faiss.IndexIVF) and "nprobe" in self.index_config:
+            index.nprobe = self.index_config["nprobe"]
+            return {"nprobe": self.index_config["nprobe"]}
+        return {}
 
-        # Load docstore
-        docstore = load_docstore()
+    @staticmethod
+    def _build_id_map(raw_map, index, docs):
+        """Turn the {"faiss_id": "doc_id"} JSON map into an integer array"""
+        positions = {doc["id"]: i for i, doc in enumerate(docs)}
+        # ID-mapped indexes can have gaps, so size by the largest id
+        size = max([index.ntotal - 1] + [int(row) for row in raw_map]) + 1
+        id_map = np.full(size, -1, dtype=np.int64)
+        for row, doc_id in raw_map.items():
+            row = int(row)
+            if row >= 0:
+                id_map[row] = positions.get(doc_id, -1)
+        return id_map
+
+    def _consistent(self, files):
+        """
+        Whether the files to load are from the same embed_chunks run.
+
+        embed_chunks replaces them one by one and then writes a manifest of
+        their fingerprints: the index manifest for the index and JSON id
+        map, the attribute index for the mapped files. Sets written before
+        the manifests recorded them pass.
+        """
+        docstore_path, id_map_path = files
+        if id_map_path.suffix == ".npy":
+            sources = AttributeIndex.load_sources(self.attribute_index_path)
+            paths = (docstore_path, id_map_path, self.index_path)
+        else:
+            sources = self._load_manifest()
+            paths = (self.index_path, id_map_path)
+        sources = sources or {}
+        return all(sources.get(path.name, fingerprint) == fingerprint
+                   for path in paths for fingerprint in [file_fingerprint(path)])
+
+    def _load_manifest(self):
+        manifest_path = self.index_path.with_name(INDEX_MANIFEST_PATH.name)
+        try:
+            with open(manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
 
-        # Encode query
-        q_vec = model.encode([query])
+    def _mtimes(self, files):
+        docstore_path, id_map_path = files
+        return (_mtime(docstore_path), (_mtime(self.index_path), _mtime(id_map_path)),
+                _mtime(self.bm25_path))
+
+    def refresh(self):
+        """Reload whatever changed on disk since the last call"""
+        if (self._mtimes(self._files()) == self.state.version
+                and _mtime(self.config_path) == self._config_mtime):
+            return
+
+        with self._lock:
+            old = self.state
+            config_changed = _mtime(self.config_path) != self._config_mtime
+            if config_changed:
+                self.index_config = load_index_config(self.config_path)
+                self._config_mtime = _mtime(self.config_path)
+            files = docstore_path, id_map_path = self._files()
+            docstore_mtime, index_mtimes, bm25_mtime = mtimes = self._mtimes(files)
+            if not config_changed and mtimes == old.version:
+                return
+            if (mtimes != old.version and old.index is not None
+                    and not self._consistent(files)):
+                # Caught between two renames of a rewrite: keep serving the
+                # last complete set, the next refresh picks up the new one
+                return
+
+            # Build the next generation in locals and publish it in one step
+            fingerprint = old.docstore_fingerprint
+            if docstore_mtime == old.docstore_mtime and docstore_path == old.docstore_path:
+                docs = old.docs
+            else:
+                fingerprint = file_fingerprint(docstore_path)
+                docs = self._read_docstore(docstore_path)
+            if docs is old.docs and index_mtimes == old.index_mtimes:
+                index, id_map = old.index, old.id_map
+            else:
+                # Row positions change with the docstore, so the id map is rebuilt too
+                index, id_map = self._read_index(index_mtimes, docs, id_map_path)
+            state = RetrieverState(docs, index, id_map, self._apply_index_config(index),
+                                   docstore_mtime, index_mtimes, bm25_mtime, docstore_path,
+                                   fingerprint, self.bm25_path, self.attribute_index_path)
+            if docs is old.docs:
+                state._attribute_index = old._attribute_index
+                if bm25_mtime == old.bm25_mtime:
+                    state._bm25 = old._bm25
+                if index is old.index:
+                    state._doc_rows = old._doc_rows
+            self.state = state
+
+    def snapshot(self):
+        """Refresh, then return the current RetrieverState"""
+        self.refresh()
+        return self.state
+
+    def search_vectors(self, q_vecs, top_k=5, candidates=None, state=None):
+        """
+        Search the resident index with already-encoded query vectors
+
+        Args:
+            q_vecs (np.ndarray): Query embeddings, one per row
+            top_k (int): Number of results to return per query
+            candidates (list[int], optional): Restrict scoring to these docstore positions
+            state (RetrieverState, optional): Snapshot `candidates` refer to
+                (default: the current one)
+
+        Returns:
+            list: One list of document dicts per query vector
+        """
+        state = self.snapshot() if state is None else state
+        index, docs, id_map = state.index, state.docs, state.id_map
+        if index is None:
+            return [[] for _ in range(len(q_vecs))]
+
+        q_vecs = np.asarray(q_vecs, dtype=np.float32)
+        if candidates is None:
+            with span("faiss_search"):
+                D, I = index.search(q_vecs, top_k)
+        else:
+            rows = state.doc_rows[np.asarray(candidates, dtype=np.int64)]
+            rows = rows[rows >= 0]
+            if len(rows) == 0:
+                return [[] for _ in range(len(q_vecs))]
+            # Only score the pre-filtered candidates
+            selector = faiss.IDSelectorBatch(rows)
+            with span("faiss_search"):
+                D, I = index.search(q_vecs, min(top_k, len(rows)),
+                                    params=state.filtered_search_params(selector))
+        with span("docstore_lookup"):
+            return [
+                [docs[id_map[i]] for i in row if 0 <= i < len(id_map) and id_map[i] >= 0]
+                for row in I
+            ]
+
+    def keyword_search(self, query, top_k=5, candidates=None, state=None):
+        """
+        BM25 search over the docstore
+
+        Args:
+            query (str): The search query
+            top_k (int): Number of results to return
+            candidates (list[int], optional): Restrict scoring to these docstore positions
+            state (RetrieverState, optional): Snapshot `candidates` refer to
+                (default: the current one)
+
+        Returns:
+            list: Document dicts, best first
+        """
+        state = self.snapshot() if state is None else state
+        with span("bm25_search"):
+            hits = state.bm25.search(query, top_k, candidates)
+        return [state.docs[row] for row, _ in hits]
+
+    def search(self, query, top_k=5, return_metadata=False, mode=None):
+        """
+        Search for the most relevant documents
+
+        Args:
+            query (str): The search query
+            top_k (int): Number of results to return
+            return_metadata (bool): If True, return full document objects including metadata
+            mode (str, optional): One of SEARCH_MODES (default: SEARCH_MODE)
+
+        Returns:
+            list: Either list of strings (texts) or list of dicts (full documents)
+        """
+        return self.search_many([query], top_k, return_metadata, mode=mode)[0]
+
+    def search_many(self, queries, top_k=5, return_metadata=False, filters=None, mode=None):
+        """
+        Search for several queries at once, encoding them in a single batch
+
+        Structured constraints in a query ("SUVs under AED 400,000 with 7
+        seats") are matched against the attribute index first and only the
+        matching documents are scored. If nothing matches, the whole index is
+        searched instead. In "hybrid" mode the FAISS and BM25 results are
+        merged by reciprocal rank fusion.
+
+        Args:
+            queries (list[str]): The search queries
+            top_k (int): Number of results to return per query
+            return_metadata (bool): If True, return full document objects including metadata
+            filters (dict, optional): Explicit AttributeIndex.filter() arguments
+                applied to every query instead of parsing them from the text.
+                Explicit filters are strict: no match means no results.
+            mode (str, optional): One of SEARCH_MODES (default: SEARCH_MODE)
+
+        Returns:
+            list: One result list per query, as returned by search()
+        """
+        mode = SEARCH_MODE if mode is None else mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode} (expected one of {SEARCH_MODES})")
+
+        def fallback():
+            results = [fallback_search(q, top_k) for q in queries]
+            return results if return_metadata else [[r["text"] for r in res] for res in results]
+
+        if not queries:
+            return []
 
-        # Search
-        D, I = index.search(np.array(q_vec), top_k)
+        try:
+            # Check if index exists
+            if not ensure_index_exists():
+                return fallback()
+
+            state = self.snapshot()
+            attribute_index = state.attribute_index
+            results = [None] * len(queries)
+
+            # Queries naming specific models get those documents directly
+            if DIRECT_MODEL_FETCH and filters is None:
+                for i, query in enumerate(queries):
+                    positions = attribute_index.mentioned_models(query)
+                    if positions:
+                        results[i] = [state.docs[pos] for pos in positions[:top_k]]
+            pending = [i for i, res in enumerate(results) if res is None]
+            if not pending:
+                return results if return_metadata else [[r["text"] for r in res] for res in results]
+
+            # Pre-filter on structured attributes where the query has any
+            candidates = {}
+            for i in pending:
+                query_filters = filters if filters is not None else attribute_index.parse_filters(queries[i])
+                candidates[i] = attribute_index.filter(**query_filters) if query_filters else None
+
+            # Fused modes take a deeper list from each retriever
+            depth = top_k if mode == "vector" else max(top_k, HYBRID_DEPTH)
+            vector = (self._vector_results(queries, pending, candidates, depth, filters, state)
+                      if mode != "bm25" else {})
+            if vector is None:
+                return fallback()
+
+            for i in pending:
+                if mode == "vector":
+                    results[i] = vector[i]
+                    continue
+                keyword = (self.keyword_search(queries[i], depth, candidates[i], state)
+                           if candidates[i] != [] else [])
+                # Parsed filters are only a hint: search everything if they match nothing
+                if not keyword and candidates[i] is not None and filters is None:
+                    keyword = self.keyword_search(queries[i], depth, state=state)
+                results[i] = keyword[:top_k] if mode == "bm25" else reciprocal_rank_fusion(
+                    [vector[i], keyword], top_k)
+
+            if not return_metadata:
+                results = [[r["text"] for r in res] for res in results]
+
+            return results
+        except Exception as e:
+            print(f"Error during search: {e}")
+            return fallback()
+
+    def _vector_results(self, queries, pending, candidates, top_k, filters, state):
+        """
+        FAISS results of the queries at the `pending` positions.
+
+        Returns:
+            dict: Position -> document dicts, or None if the queries could
+                not be encoded
+        """
+        # Encode queries (cached where possible)
+        q_vecs = encode_queries([queries[i] for i in pending])
+        if q_vecs is None:
+            return None
+        vec_rows = {i: row for row, i in enumerate(pending)}
+
+        results = {}
+        unfiltered = []
+        for i in pending:
+            if candidates[i] is None:
+                unfiltered.append(i)
+                continue
+            row = vec_rows[i]
+            results[i] = (self.search_vectors(q_vecs[row:row + 1], top_k, candidates[i], state)[0]
+                          if candidates[i] else [])
+            # Parsed filters are only a hint: search everything if they match nothing
+            if not results[i] and filters is None:
+                unfiltered.append(i)
+
+        # Search the resident index for everything else in one batch
+        if unfiltered:
+            rows = [vec_rows[i] for i in unfiltered]
+            for i, res in zip(unfiltered, self.search_vectors(q_vecs[rows], top_k, state=state)):
+                results[i] = res
+        return results
 
-        # Get results
+    def get_model_by_name(self, model_name):
+        """Get a specific Mercedes model by name"""
+        state = self.snapshot()
+        pos = state.attribute_index.find_model(model_name)
+        return None if pos is None else state.docs[pos]
+
+    def get_models_by_criteria(self, criteria, min_price=None, max_price=None):
+        """
+        Get models matching specific criteria
+
+        Args:
+            criteria (dict): Dictionary of criteria to match (e.g., {"body style": "SUV"})
+            min_price (float, optional): Lowest starting price in AED
+            max_price (float, optional): Highest starting price in AED
+
+        Returns:
+            list: List of matching models
+        """
+        state = self.snapshot()
+        docs, attribute_index = state.docs, state.attribute_index
+        candidates = attribute_index.filter(criteria, min_price, max_price)
+        positions = range(len(docs)) if candidates is None else candidates
+
+        # Criteria on attributes that are not indexed are checked directly
+        remaining = [(key.lower(), value.lower()) for key, value in criteria.items()
+                     if key.lower() not in attribute_index.postings]
         results = []
-        for i in I[0]:
-            if str(i) in id_map and id_map[str(i)] in docstore:
-                results.append(docstore[id_map[str(i)]])
 
-        if not return_metadata:
-            results = [r["text"] for r in results]
+        for pos in positions:
+            metadata = docs[pos]["metadata"]
+            if all(key in metadata and value in metadata[key].lower()
+                   for key, value in remaining):
+                results.append(docs[pos])
 
         return results
-    except Exception as e:
-        print(f"Error during search: {e}")
-        results = fallback_search(query, top_k)
-        return results if return_metadata else [r["text"] for r in results]
 
 
-def get_model_by_name(model_name):
-    """Get a specific Mercedes model by name"""
-    docstore = load_docstore()
+# Shared retriever instance, created on first use
+retriever = None
+
 
-    model_name_lower = model_name.lower()
+def get_retriever():
+    """Return the shared Retriever instance"""
+    global retriever
+    if retriever is None:
+        retriever = Retriever(mmap=RETRIEVER_MMAP)
+    return retriever
 
-    # Look for model by name
-    for doc_id, doc in docstore.items():
-        if "metadata" in doc and "model" in doc["metadata"]:
-            doc_model = doc["metadata"]["model"].lower()
-            if model_name_lower in doc_model:
-                return doc
 
-    return None
+def search(query, top_k=5, return_metadata=False, mode=None):
+    """
+    Search for the most relevant documents
+
+    Args:
+        query (str): The search query
+        top_k (int): Number of results to return
+        return_metadata (bool): If True, return full document objects including metadata
+        mode (str, optional): "vector", "bm25" or "hybrid" (default: SEARCH_MODE)
+
+    Returns:
+        list: Either list of strings (texts) or list of dicts (full documents)
+    """
+    return get_retriever().search(query, top_k, return_metadata, mode)
 
 
-def get_models_by_criteria(criteria):
+def search_many(queries, top_k=5, return_metadata=False, mode=None):
     """
-    Get models matching specific criteria
+    Search for several queries at once, encoding them in a single batch
 
     Args:
-        criteria (dict): Dictionary of criteria to match (e.g., {"body style": "SUV"})
+        queries (list[str]): The search queries
+        top_k (int): Number of results to return per query
+        return_metadata (bool): If True, return full document objects including metadata
+        mode (str, optional): "vector", "bm25" or "hybrid" (default: SEARCH_MODE)
 
     Returns:
-        list: List of matching models
+        list: One result list per query, as returned by search()
     """
-    docstore = load_docstore()
-    results = []
+    return get_retriever().search_many(queries, top_k, return_metadata, mode=mode)
 
-    for doc_id, doc in docstore.items():
-        if "metadata" not in doc:
-            continue
 
-        match = True
-        for key, value in criteria.items():
-            key_lower = key.lower()
-            if key_lower not in doc["metadata"] or value.lower() not in doc["metadata"][key_lower].lower():
-                match = False
-                break
+def get_model_by_name(model_name):
+    """Get a specific Mercedes model by name"""
+    return get_retriever().get_model_by_name(model_name)
+
+
+def get_models_by_criteria(criteria, min_price=None, max_price=None):
+    """
+    Get models matching specific criteria
 
-        if match:
-            results.append(doc)
+    Args:
+        criteria (dict): Dictionary of criteria to match (e.g., {"body style": "SUV"})
+        min_price (float, optional): Lowest starting price in AED
+        max_price (float, optional): Highest starting price in AED
 
-    return results
+    Returns:
+        list: List of matching models
+    """
+    return get_retriever().get_models_by_criteria(criteria, min_price, max_price)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+# app/response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Response cache settings
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 3600  # seconds
+# Cosine similarity above which two queries count as paraphrases
+RESPONSE_CACHE_THRESHOLD = 0.92
+
+
+class ResponseCache:
+    """
+    Semantic cache of generated responses.
+
+    Entries are grouped by key (intent and retrieved document ids) and a
+    lookup returns the response of the most similar cached query in the
+    group if its cosine similarity clears the threshold. Entries expire after
+    `ttl` seconds, the least recently used ones are evicted beyond `max_size`
+    and everything is dropped when the docstore version changes, so price
+    updates are never answered from stale responses.
+    """
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL,
+                 threshold=RESPONSE_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.version = None
+        # entry id -> (key, unit query vector, response, created)
+        self._entries = OrderedDict()
+        # key -> entry ids
+        self._groups = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._groups.clear()
+            self.version = version
+
+    def _remove(self, entry_id):
+        key = self._entries.pop(entry_id)[0]
+        group = self._groups[key]
+        group.remove(entry_id)
+        if not group:
+            del self._groups[key]
+
+    def get(self, key, vector, version=None):
+        """Cached response for a similar query under `key`, or None"""
+        vector = _unit(vector)
+        with self._lock:
+            self._check_version(version)
+            now = time.monotonic()
+            best_id, best_sim = None, self.threshold
+            for entry_id in list(self._groups.get(key, ())):
+                _, cached_vector, _, created = self._entries[entry_id]
+                if now - created >= self.ttl:
+                    self._remove(entry_id)
+                    continue
+                sim = float(cached_vector @ vector)
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def put(self, key, vector, response, version=None):
+        with self._lock:
+            self._check_version(version)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (key, _unit(vector), response, time.monotonic())
+            self._groups.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,348 @@
+# app/server.py
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.chat_engine import (EMPTY_INPUT_RESPONSE, ERROR_RESPONSE, fast_path,
+                             finish_session_turn, generate_session_response,
+                             prepare_session_turn, prepare_turn, response_cache, sessions,
+                             store_response)
+from app.llm_backend import generate
+from app.llm_pool import LLM_THREADS_PER_WORKER, LLMPool
+from app.tracing import tracer
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+# Prompts waiting for the single Llama instance; beyond this new requests are rejected
+QUEUE_SIZE = 32
+# Seconds a request may take end to end (queueing included)
+REQUEST_TIMEOUT = 120
+# Threads used for intent/sentiment classification and retrieval
+PREP_WORKERS = 4
+# llama.cpp worker processes; 1 keeps generation in this process
+LLM_WORKERS = 1
+# Number of recent requests used for latency percentiles
+LATENCY_WINDOW = 1000
+
+MAX_BODY_SIZE = 64 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SessionBusy(Exception):
+    pass
+
+
+class LLMQueue:
+    """
+    Serializes access to the non-thread-safe Llama object.
+
+    Jobs wait in a bounded asyncio queue and a single worker runs them one at
+    a time on a dedicated thread, so the event loop never blocks on
+    generation. With an LLMPool, one consumer per pool process forwards jobs
+    to the pool instead.
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE, pool=None):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        self.pool = pool
+        self.workers = []
+
+    def start(self):
+        n_consumers = self.pool.n_workers if self.pool is not None else 1
+        self.workers = [asyncio.create_task(self._run()) for _ in range(n_consumers)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def _generate(self, prefix, suffix, turn=None):
+        if turn is not None:
+            # Session turn: the snapshot only exists in this process, pool
+            # workers prefill the whole history
+            if self.pool is not None:
+                text = await asyncio.wrap_future(self.pool.submit(turn[1]))
+                finish_session_turn(turn, text)
+                return text
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, generate_session_response, turn)
+        if self.pool is not None:
+            return await asyncio.wrap_future(
+                self.pool.submit(prefix + suffix, prefix=prefix))
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: generate(prefix + suffix, prefix=prefix))
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    def submit(self, prefix, suffix, turn=None):
+        """Queue a prompt (or a session turn) and return a future for the generated text"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((prefix, suffix, turn, future))
+        except asyncio.QueueFull:
+            raise QueueFull()
+        return future
+
+    async def _run(self):
+        while True:
+            prefix, suffix, turn, future = await self.queue.get()
+            try:
+                # Skip jobs whose request already timed out
+                if future.done():
+                    continue
+                text = await self._generate(prefix, suffix, turn)
+                if not future.done():
+                    future.set_result(text)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                # The session was claimed by ChatServer.handle_chat when the turn was queued
+                if turn is not None:
+                    sessions.end_turn(turn[0].id)
+                self.queue.task_done()
+
+
+class ChatServer:
+    def __init__(self, queue_size=QUEUE_SIZE, timeout=REQUEST_TIMEOUT,
+                 prep_workers=PREP_WORKERS, llm_workers=LLM_WORKERS,
+                 threads_per_worker=LLM_THREADS_PER_WORKER):
+        self.timeout = timeout
+        self.llm_workers = llm_workers
+        self.threads_per_worker = threads_per_worker
+        self.pool = None
+        self.queue_size = queue_size
+        self.prep_executor = ThreadPoolExecutor(
+            max_workers=prep_workers, thread_name_prefix="prep")
+        self.llm_queue = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"ok": 0, "rejected": 0, "timeout": 0, "error": 0}
+
+    @staticmethod
+    def _end_prep_turn(prep, session_id):
+        """Release a session whose request timed out once its prep thread has finished"""
+        if not prep.cancelled() and prep.exception() is not None:
+            print(f"Error processing input: {prep.exception()}")
+        sessions.end_turn(session_id)
+
+    async def handle_chat(self, message, session_id=None):
+        """Run one turn: classification and retrieval in the thread pool, generation via the queue"""
+        if not message or message.strip() == "":
+            return EMPTY_INPUT_RESPONSE
+
+        loop = asyncio.get_running_loop()
+        if session_id is not None:
+            # One turn per session at a time; the LLM queue releases it once recorded
+            if not sessions.begin_turn(session_id, blocking=False):
+                raise SessionBusy()
+            prep = loop.run_in_executor(
+                self.prep_executor, prepare_session_turn, session_id, message)
+            try:
+                # Shielded, so a timeout does not release the session while the
+                # prep thread can still record a templated turn
+                response, turn = await asyncio.shield(prep)
+            except asyncio.CancelledError:
+                prep.add_done_callback(lambda f: self._end_prep_turn(f, session_id))
+                raise
+            except Exception as e:
+                sessions.end_turn(session_id)
+                print(f"Error processing input: {e}")
+                return ERROR_RESPONSE
+
+            # Templated answers are already recorded and skip the LLM queue
+            if response is not None:
+                sessions.end_turn(session_id)
+                return response
+            try:
+                future = self.llm_queue.submit(None, None, turn)
+            except QueueFull:
+                sessions.end_turn(session_id)
+                raise
+            return await future
+
+        try:
+            cached, prompt, slot = await loop.run_in_executor(
+                self.prep_executor, prepare_turn, message)
+        except Exception as e:
+            print(f"Error processing input: {e}")
+            return ERROR_RESPONSE
+
+        # Templated answers and paraphrases of recent questions skip the LLM queue entirely
+        if cached is not None:
+            return cached
+
+        response = await self.llm_queue.submit(*prompt)
+        store_response(slot, response)
+        return response
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+    def metrics(self):
+        return {
+            "queue_depth": self.llm_queue.depth,
+            "llm_workers": self.llm_workers,
+            "queue_size": self.queue_size,
+            "requests": dict(self.counts),
+            "latency_ms": {
+                "p50": round(self.percentile(50), 1),
+                "p95": round(self.percentile(95), 1),
+                "samples": len(self.latencies),
+            },
+            "response_cache": response_cache.stats(),
+            "fast_path": fast_path.stats(),
+            "sessions": sessions.stats(),
+        }
+
+    async def route(self, method, path, body):
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.metrics()
+
+        # Per-stage histograms from app.tracing (empty unless TRACING=1)
+        if path == "/metrics/prometheus":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, tracer.to_prometheus()
+
+        if path != "/chat":
+            return 404, {"error": "Not found"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        try:
+            data = json.loads(body or b"{}")
+            message = data.get("message", "")
+            session_id = data.get("session_id")
+        except (json.JSONDecodeError, AttributeError):
+            return 400, {"error": "Body must be a JSON object with a 'message' field"}
+        if session_id is not None and not isinstance(session_id, str):
+            return 400, {"error": "'session_id' must be a string"}
+
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self.handle_chat(message, session_id), self.timeout)
+        except QueueFull:
+            self.counts["rejected"] += 1
+            return 503, {"error": "Server busy, please retry"}
+        except SessionBusy:
+            self.counts["rejected"] += 1
+            return 409, {"error": "The previous message of this session is still being answered"}
+        except asyncio.TimeoutError:
+            self.counts["timeout"] += 1
+            return 504, {"error": "Request timed out"}
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            self.counts["error"] += 1
+            return 200, {"response": ERROR_RESPONSE}
+
+        latency = (time.perf_counter() - start) * 1000
+        self.latencies.append(latency)
+        self.counts["ok"] += 1
+        return 200, {"response": response, "latency_ms": round(latency, 1)}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            status, payload = await self._read_and_route(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, payload = 400, {"error": "Malformed request"}
+
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_and_route(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, path, _ = request_line.split(" ", 2)
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            return 413, {"error": "Request body too large"}
+        body = await reader.readexactly(length) if length else b""
+
+        return await self.route(method.upper(), path.split("?", 1)[0], body)
+
+    async def serve(self, host=HOST, port=PORT):
+        if self.llm_workers > 1:
+            print(f"⏳ Starting {self.llm_workers} LLM workers...")
+            self.pool = LLMPool(self.llm_workers, self.threads_per_worker).start()
+        self.llm_queue = LLMQueue(self.queue_size, self.pool)
+        self.llm_queue.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"🚗 Mercedes-Benz AI Assistant listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.llm_queue.stop()
+            self.prep_executor.shutdown(wait=False)
+            if self.pool is not None:
+                self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the assistant over HTTP")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--prep-workers", type=int, default=PREP_WORKERS)
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS)
+    parser.add_argument("--threads-per-worker", type=int, default=LLM_THREADS_PER_WORKER,
+                        help="Threads per LLM worker (default: the cores split between the workers)")
+    args = parser.parse_args()
+
+    server = ChatServer(args.queue_size, args.timeout, args.prep_workers,
+                        args.llm_workers, args.threads_per_worker)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# app/sessions.py
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Session settings
+# Tokens of conversation history kept per session; older turns are dropped
+SESSION_HISTORY_TOKENS = int(os.environ.get("SESSION_HISTORY_TOKENS", 1024))
+# Memory for in-process llama.cpp state snapshots across all sessions
+SESSION_SNAPSHOT_MB = int(os.environ.get("SESSION_SNAPSHOT_MB", 1024))
+# Seconds after which an idle session is forgotten
+SESSION_IDLE_TTL = int(os.environ.get("SESSION_IDLE_TTL", 1800))
+# Snapshots pushed out of memory are written here; empty disables spilling
+SESSION_SPILL_DIR = os.environ.get("SESSION_SPILL_DIR", str(BASE_DIR / "data" / "sessions"))
+
+
+class Session:
+    """
+    Conversation history of one session and its latest llama.cpp snapshot.
+
+    The prompt of every turn is `transcript` plus the new turn, and the
+    snapshot is the model state right after the previous turn's response,
+    so restoring it leaves only the new turn to prefill.
+    """
+
+    def __init__(self, session_id, header=""):
+        self.id = session_id
+        self.header = header
+        self.turns = []          # (turn text, n_tokens)
+        self.snapshot = None     # in-memory llama.cpp state
+        self.snapshot_size = 0
+        self.spill_path = None   # snapshot on disk, when spilled
+        self.last_used = time.monotonic()
+
+    @property
+    def transcript(self):
+        return self.header + "".join(text for text, _ in self.turns)
+
+    @property
+    def n_tokens(self):
+        return sum(n for _, n in self.turns)
+
+
+class SessionStore:
+    """
+    Sessions keyed by id, with token-budgeted history and KV-state snapshots.
+
+    Sessions idle for `idle_ttl` seconds are dropped. When the snapshots in
+    memory exceed `max_snapshot_mb`, those of the least recently used
+    sessions are spilled to `spill_dir` (or dropped without one); a session
+    without a snapshot keeps its history and just prefills all of it on its
+    next turn.
+
+    Turns of one session must not overlap (each builds on the history and
+    snapshot the previous one left), so callers claim the session with
+    begin_turn() and release it with end_turn().
+    """
+
+    def __init__(self, history_tokens=SESSION_HISTORY_TOKENS, max_snapshot_mb=SESSION_SNAPSHOT_MB,
+                 idle_ttl=SESSION_IDLE_TTL, spill_dir=SESSION_SPILL_DIR, header=""):
+        self.history_tokens = history_tokens
+        self.max_snapshot_bytes = max_snapshot_mb * 1024 * 1024
+        self.idle_ttl = idle_ttl
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.header = header
+        self.snapshot_bytes = 0
+        self.counts = {"restored": 0, "restored_from_disk": 0, "spilled": 0,
+                       "dropped": 0, "trimmed": 0, "expired": 0}
+        self._sessions = OrderedDict()  # session id -> Session, least recently used first
+        self._lock = threading.Lock()
+        self._busy = set()  # ids of sessions with a turn in progress
+        self._turn_ended = threading.Condition(self._lock)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """The session with this id, created if new or expired"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self.header)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def begin_turn(self, session_id, blocking=True):
+        """
+        Claim a session for one turn, waiting for its current turn to end.
+
+        Returns:
+            bool: False if the session is busy and `blocking` is False
+        """
+        with self._turn_ended:
+            while session_id in self._busy:
+                if not blocking:
+                    return False
+                self._turn_ended.wait()
+            self._busy.add(session_id)
+            return True
+
+    def end_turn(self, session_id):
+        """Release a session claimed with begin_turn()"""
+        with self._turn_ended:
+            self._busy.discard(session_id)
+            self._turn_ended.notify_all()
+
+    def fits(self, session, n_tokens):
+        """Whether a turn of `n_tokens` is kept without trimming, and with it its snapshot"""
+        return session.n_tokens + n_tokens <= self.history_tokens
+
+    def load_snapshot(self, session):
+        """The session's latest snapshot (read back from disk if spilled), or None"""
+        with self._lock:
+            if session.snapshot is not None:
+                self.counts["restored"] += 1
+                return session.snapshot
+            if session.spill_path is None:
+                return None
+
+            try:
+                with open(session.spill_path, "rb") as f:
+                    state = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                print(f"Warning: Could not read session snapshot {session.spill_path}: {e}")
+                state = None
+            self._remove_spill(session)
+            if state is not None:
+                self.counts["restored_from_disk"] += 1
+                self._keep(session, state)
+            return state
+
+    def record_turn(self, session, text, n_tokens, state=None):
+        """
+        Append a finished turn to the session's history.
+
+        `state` is the model state after the turn. Once the history exceeds
+        the token budget the oldest turns are dropped down to half of it, so
+        trimming (which invalidates the snapshot, as the prompt no longer
+        starts the same way) happens once every few turns, not every turn.
+        """
+        with self._lock:
+            session.turns.append((text, n_tokens))
+            session.last_used = time.monotonic()
+            self._discard_snapshot(session)
+
+            if session.n_tokens > self.history_tokens:
+                self.counts["trimmed"] += 1
+                while session.turns and session.n_tokens > self.history_tokens // 2:
+                    session.turns.pop(0)
+                return
+            if state is not None:
+                self._keep(session, state)
+
+    def drop(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._discard_snapshot(session)
+
+    def clear(self):
+        with self._lock:
+            for session in self._sessions.values():
+                self._discard_snapshot(session)
+            self._sessions.clear()
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "snapshots_in_memory": sum(s.snapshot is not None for s in self._sessions.values()),
+            "snapshots_on_disk": sum(s.spill_path is not None for s in self._sessions.values()),
+            "snapshot_mb": round(self.snapshot_bytes / (1024 * 1024), 1),
+            **self.counts,
+        }
+
+    def _keep(self, session, state):
+        """Hold `state` in memory and push older snapshots out beyond the cap"""
+        session.snapshot = state
+        session.snapshot_size = getattr(state, "llama_state_size", 0)
+        self.snapshot_bytes += session.snapshot_size
+        for other in list(self._sessions.values()):
+            if self.snapshot_bytes <= self.max_snapshot_bytes:
+                break
+            if other is not session and other.snapshot is not None:
+                self._spill(other)
+
+    def _spill(self, session):
+        if self.spill_dir is not None:
+            name = hashlib.sha1(session.id.encode("utf-8")).hexdigest()
+            path = self.spill_dir / f"{name}.state"
+            try:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(session.snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+                session.spill_path = path
+                self.counts["spilled"] += 1
+            except OSError as e:
+                print(f"Warning: Could not spill session snapshot to {path}: {e}")
+        if session.spill_path is None:
+            self.counts["dropped"] += 1
+        self.snapshot_bytes -= session.snapshot_size
+        session.snapshot = None
+        session.snapshot_size = 0
+
+    def _remove_spill(self, session):
+        if session.spill_path is not None:
+            try:
+                os.remove(session.spill_path)
+            except OSError:
+                pass
+            session.spill_path = None
+
+    def _discard_snapshot(self, session):
+        self.snapshot_bytes -= session.snapshot_size
+        session.snapshot = None
+        session.snapshot_size = 0
+        self._remove_spill(session)
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self._discard_snapshot(session)
+            self.counts["expired"] += 1
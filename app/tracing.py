@@ -0,0 +1,156 @@
+# app/tracing.py
+
+import atexit
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+# Record per-stage timings; when off, spans are a shared no-op context manager
+TRACING = os.environ.get("TRACING", "0") == "1"
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Prometheus text file written at exit (and by dump())
+METRICS_PATH = Path(os.environ.get("METRICS_PATH", BASE_DIR / "data" / "metrics.prom"))
+
+METRIC_PREFIX = "assistant_"
+
+# Histogram name -> (help text, label name, bucket upper bounds)
+HISTOGRAMS = {
+    "stage_latency_ms": (
+        "Wall time of each turn stage in milliseconds", "stage",
+        (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)),
+    "llm_tokens_per_second": (
+        "llama.cpp prefill and decode throughput", "phase",
+        (1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500, 1000)),
+    "llm_tokens": (
+        "Prompt and generated tokens per generation", "phase",
+        (8, 16, 32, 64, 128, 256, 512, 1024, 2048)),
+}
+# Counter name -> (help text, label name)
+COUNTERS = {
+    "errors_total": ("Exceptions caught per stage", "stage"),
+}
+
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "start")
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.stage, (time.perf_counter() - self.start) * 1000)
+        if exc_type is not None:
+            self.tracer.increment("errors_total", self.stage)
+
+
+class Tracer:
+    """
+    Aggregates stage timings and llama.cpp throughput into histograms.
+
+    Usage: `with tracer.span("faiss_search"): ...`. When disabled, span()
+    returns a shared no-op context manager and observe() returns at once.
+    """
+
+    def __init__(self, enabled=TRACING):
+        self.enabled = enabled
+        self._histograms = {}  # (name, label value) -> Histogram
+        self._counters = {}    # (name, label value) -> int
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, ms):
+        """Record `ms` milliseconds spent in `stage`"""
+        self.observe("stage_latency_ms", stage, ms)
+
+    def observe(self, name, label, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = Histogram(HISTOGRAMS[name][2])
+            histogram.observe(value)
+
+    def increment(self, name, label, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, label)] = self._counters.get((name, label), 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, (help_text, label_name, _) in HISTOGRAMS.items():
+                series = sorted((label, h) for (n, label), h in self._histograms.items() if n == name)
+                if not series:
+                    continue
+                metric = METRIC_PREFIX + name
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for label, histogram in series:
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label_name}="{label}"}} {histogram.sum:.3f}')
+                    lines.append(f'{metric}_count{{{label_name}="{label}"}} {histogram.count}')
+
+            for name, (help_text, label_name) in COUNTERS.items():
+                series = sorted((label, v) for (n, label), v in self._counters.items() if n == name)
+                if not series:
+                    continue
+                metric = METRIC_PREFIX + name
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{{label_name}="{label}"}} {value}' for label, value in series]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, path=METRICS_PATH):
+        """Write the Prometheus text to `path` (atomically)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+tracer = Tracer()
+span = tracer.span
+
+if TRACING:
+    atexit.register(tracer.dump)
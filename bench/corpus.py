@@ -0,0 +1,108 @@
+# bench/corpus.py
+
+import random
+
+# Model names drawn into the message templates
+MODELS = [
+    "A-Class", "C-Class", "E-Class", "S-Class", "CLA", "CLE", "GLA", "GLB", "GLC",
+    "GLE", "GLS", "G-Class", "EQA", "EQB", "EQE", "EQS", "AMG GT", "SL", "Maybach S 680",
+]
+BODY_STYLES = ["SUV", "sedan", "coupe", "cabriolet", "hatchback"]
+BUDGETS = ["200,000", "300k", "400,000", "500k", "750,000"]
+
+# Message templates for each of the nine intents the classifier knows
+TEMPLATES = {
+    "informed": [
+        "I want the {model} in black with the AMG line.",
+        "I've decided on the {model}, what's the next step?",
+        "Give me the full spec sheet of the {model}.",
+        "I'm buying a {model}, nothing else.",
+    ],
+    "exploratory": [
+        "I'm not sure which {body} would suit a family of five.",
+        "What would you recommend for someone who drives mostly in the city?",
+        "Can you show me some options for a {body} under AED {budget}?",
+        "I'm thinking about an electric car but don't know where to start.",
+    ],
+    "test_drive": [
+        "Can I test drive the {model} this weekend?",
+        "I'd like to book a test drive of the {model}.",
+        "Is it possible to take the {model} out for a drive?",
+        "How do I schedule a drive in the {model}?",
+    ],
+    "compare_models": [
+        "Compare the {model} and the {other}.",
+        "What's the difference between the {model} and the {other}?",
+        "{model} vs {other}, which one is better for long trips?",
+        "Should I get the {model} or the {other}?",
+    ],
+    "price_inquiry": [
+        "How much is the {model}?",
+        "What's the starting price of the {model} in AED?",
+        "Are there any financing offers on the {model}?",
+        "What would the monthly payment be for a {model}?",
+    ],
+    "availability": [
+        "Is the {model} available right now?",
+        "Do you have the {model} in stock?",
+        "What's the delivery time for a new {model}?",
+        "Is there a waitlist for the {model}?",
+    ],
+    "booking": [
+        "I'd like to schedule a showroom visit on Saturday.",
+        "Can someone call me back about the {model}?",
+        "Book me an appointment with a sales consultant.",
+        "I want to visit the showroom to see the {model}.",
+    ],
+    "after_sales": [
+        "When is the first service due on my {model}?",
+        "What does the warranty cover on the {model}?",
+        "How much does maintenance cost for a {model}?",
+        "My {model} needs service, who do I contact?",
+    ],
+    "exit": [
+        "Thanks, that's all for today. Bye!",
+        "Goodbye.",
+        "I have to leave now, thank you.",
+        "That's everything, see you.",
+    ],
+}
+INTENTS = list(TEMPLATES)
+
+
+def make_corpus(n_messages, seed=0):
+    """
+    Reproducible list of {"text", "intent"} customer messages.
+
+    Intents are cycled so every one of the nine gets an equal share; the
+    template and the model, body style and budget slots are drawn from a
+    seeded RNG, so the same (n_messages, seed) always gives the same corpus.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_messages):
+        intent = INTENTS[i % len(INTENTS)]
+        model, other = rng.sample(MODELS, 2)
+        text = rng.choice(TEMPLATES[intent]).format(
+            model=model, other=other, body=rng.choice(BODY_STYLES), budget=rng.choice(BUDGETS))
+        corpus.append({"text": text, "intent": intent})
+    return corpus
+
+
+# Catalog fields of the synthetic docstore chunks
+CHUNK_BODY_STYLES = ["SUV", "Sedan", "Coupe", "Cabriolet", "Hatchback", "Estate"]
+POWERTRAINS = ["Petrol", "Diesel", "Hybrid", "Electric"]
+
+
+def chunk_text(i):
+    """Text of synthetic chunk `i`, in the "Key: Value | ..." format csv2chunks.py writes"""
+    return (f"Model: Mercedes Model {i} | "
+            f"Body Style: {CHUNK_BODY_STYLES[i % len(CHUNK_BODY_STYLES)]} | "
+            f"Powertrain: {POWERTRAINS[i % len(POWERTRAINS)]} | "
+            f"Seats: {4 + i % 4} | "
+            f"Starting Price: AED {150000 + (i * 7919) % 850000}")
+
+
+def make_chunks(n_docs):
+    """Reproducible docstore chunks ({"id", "text"}) for the retrieval and indexing benchmarks"""
+    return [{"id": f"model_{i}", "text": chunk_text(i)} for i in range(n_docs)]
@@ -0,0 +1,180 @@
+# bench/run_bench.py
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import chat_engine
+from app.model_loading import load_times
+from app.query_interface import search
+from bench.corpus import make_corpus
+from bench.stub_llm import StubLLM
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BASE_DIR / "bench" / "results"
+
+STAGES = ("intent", "sentiment", "search", "generate", "turn")
+
+# Settings that change performance, recorded with every run
+CONFIG_ENV = ("INTENT_BACKEND", "MODEL_RUNTIME", "RETRIEVER_MMAP", "LLM_THREADS",
+              "LLM_GPU_LAYERS", "LLM_BATCH", "TRACING")
+
+
+def stage_functions(top_k, max_tokens):
+    """Stage name -> function of one corpus message"""
+    clf = chat_engine.intent_clf
+    return {
+        "intent": lambda m: clf.classify_intent(m["text"]),
+        "sentiment": lambda m: clf.classify_sentiment(m["text"]),
+        "search": lambda m: search(m["text"], top_k=top_k),
+        # Labelled intent and no context, so only the LLM is measured
+        "generate": lambda m: chat_engine.generate(
+            chat_engine.generate_prompt(m["text"], m["intent"], "POSITIVE", []),
+            max_tokens=max_tokens),
+        "turn": lambda m: chat_engine.handle_user_input(m["text"]),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(fn, corpus):
+    latencies = []
+    start = time.perf_counter()
+    for message in corpus:
+        t0 = time.perf_counter()
+        fn(message)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "n": len(latencies),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print p50/p95/throughput changes of every stage against a baseline run"""
+    print(f"\nAgainst {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'stage':>10} {'p50':>9} {'p95':>9} {'throughput':>11}")
+    for stage, stats in results["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old is None:
+            continue
+        changes = [(stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                   for key in ("p50_ms", "p95_ms", "throughput_per_s")]
+        print(f"{stage:>10} {changes[0]:>+8.1f}% {changes[1]:>+8.1f}% {changes[2]:>+10.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end and per-stage latency benchmark on a synthetic conversation corpus")
+    parser.add_argument("--messages", type=int, default=90,
+                        help="Corpus size (spread evenly over the nine intents)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="Replace llama.cpp with a deterministic stub (CI-speed runs)")
+    parser.add_argument("--stub-token-ms", type=float, default=0.0,
+                        help="Simulated decode time per token of the stub LLM")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="Keep the semantic response cache on during \"turn\"")
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false",
+                        help="Send every \"turn\" to the LLM, templated answers included")
+    parser.add_argument("--output", type=Path,
+                        help="Results JSON (default: bench/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    if args.stub_llm:
+        StubLLM(token_ms=args.stub_token_ms).install()
+    # Repeated templates would otherwise be answered from the cache
+    chat_engine.RESPONSE_CACHE = args.response_cache
+    chat_engine.FAST_PATH = args.fast_path
+
+    corpus = make_corpus(args.messages, args.seed)
+    print(f"Warming up models ({len(corpus)} messages, stub LLM: {args.stub_llm})...")
+    chat_engine.warm_up()
+
+    functions = stage_functions(args.top_k, args.max_tokens)
+    stages = {}
+    print(f"\n{'stage':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} "
+          f"{'per s':>8} {'peak RSS (MB)':>14}")
+    for stage in args.stages:
+        functions[stage](corpus[0])  # first-call overhead is not part of the numbers
+        chat_engine.fast_path.clear()
+        stats = stages[stage] = run_stage(functions[stage], corpus)
+        if stage == "turn" and args.fast_path:
+            stats["fast_path"] = chat_engine.fast_path.stats()
+        print(f"{stage:>10} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+              f"{stats['p99_ms']:>10.1f} {stats['throughput_per_s']:>8.2f} "
+              f"{stats['peak_rss_mb']:>14.0f}")
+        if "fast_path" in stats:
+            print(f"{'':>10} {stats['fast_path']['skip_rate']:.0%} of turns answered "
+                  f"without the LLM")
+
+    commit = git_commit()
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "messages": args.messages,
+            "seed": args.seed,
+            "top_k": args.top_k,
+            "max_tokens": args.max_tokens,
+            "stub_llm": args.stub_llm,
+            "response_cache": args.response_cache,
+            "fast_path": args.fast_path,
+            "env": {name: os.environ[name] for name in CONFIG_ENV if name in os.environ},
+            "load_times_s": {name: round(secs, 3) for name, secs in load_times.items()},
+        },
+        "stages": stages,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench/stub_llm.py
+
+import time
+
+from app import chat_engine, llm_backend
+
+STUB_WORDS = ("The", "Mercedes-Benz", "model", "you", "asked", "about", "starts",
+              "at", "AED", "and", "is", "available", "for", "a", "test", "drive.")
+
+
+class StubLLM:
+    """
+    Deterministic stand-in for llama.cpp, for CI-speed benchmark runs.
+
+    Returns a fixed response of `n_tokens` words; `prefill_ms_per_kchar` and
+    `token_ms` simulate prompt processing and decoding time if a run should
+    still reflect prompt length and response length.
+    """
+
+    def __init__(self, n_tokens=48, token_ms=0.0, prefill_ms_per_kchar=0.0):
+        self.n_tokens = n_tokens
+        self.token_ms = token_ms
+        self.prefill_ms_per_kchar = prefill_ms_per_kchar
+
+    def _words(self, prompt, max_tokens):
+        if self.prefill_ms_per_kchar:
+            time.sleep(len(prompt) / 1000 * self.prefill_ms_per_kchar / 1000)
+        for i in range(min(max_tokens, self.n_tokens)):
+            if self.token_ms:
+                time.sleep(self.token_ms / 1000)
+            yield STUB_WORDS[i % len(STUB_WORDS)]
+
+    def generate(self, prompt, max_tokens=256, temperature=0.7, top_p=0.9, prefix="", state=None):
+        return " ".join(self._words(prompt, max_tokens))
+
+    def generate_stream(self, prompt, max_tokens=256, temperature=0.7, top_p=0.9, prefix="",
+                        state=None):
+        for i, word in enumerate(self._words(prompt, max_tokens)):
+            yield word if i == 0 else " " + word
+
+    def install(self):
+        """Route llm_backend and chat_engine generation to this stub"""
+        llm_backend.generate = chat_engine.generate = self.generate
+        llm_backend.generate_stream = chat_engine.generate_stream = self.generate_stream
+        llm_backend.load_llm = chat_engine.load_llm = lambda: None
+        llm_backend.save_state = chat_engine.save_state = lambda: None
+        llm_backend.count_tokens = chat_engine.count_tokens = lambda text: len(text.split())
+        chat_engine.MODEL_LOADERS["llm"] = lambda: None
+        return self
@@ -1,9 +1,63 @@
 # cli/chat_cli.py
 
-from app.chat_engine import handle_user_input
+import time
 
+from app.chat_engine import handle_user_input_stream
+from app.model_loading import load_times
 
-def main():
+# The whole CLI chat is one session, so follow-up questions keep their context.
+# Session turns skip the per-intent prefix cache and the semantic response
+# cache, run with session_id=None (--no-session) to keep them instead.
+SESSION_ID = "cli"
+
+
+def stream_response(user_input, session_id=SESSION_ID):
+    """Print the assistant's response as it streams in, then the turn timings"""
+    start = time.perf_counter()
+    first_token_time = None
+    n_tokens = 0
+    timings = {}
+
+    print("\n🤖 Assistant: ", end="", flush=True)
+    for piece in handle_user_input_stream(user_input, timings, session_id=session_id):
+        if first_token_time is None:
+            first_token_time = time.perf_counter()
+        n_tokens += 1
+        print(piece, end="", flush=True)
+    end = time.perf_counter()
+    print("\n")
+
+    if first_token_time is not None:
+        ttft = first_token_time - start
+        decode_time = end - first_token_time
+        tokens_per_sec = (n_tokens - 1) / decode_time if decode_time > 0 else 0.0
+        stages = " | ".join(f"{name[:-3]} {ms:.0f}ms" for name, ms in timings.items())
+        print(f"⏱️  first token {ttft:.2f}s | {n_tokens} tokens | {tokens_per_sec:.1f} tok/s")
+        if stages:
+            print(f"   {stages}")
+        print()
+
+
+def report_first_response(started_at):
+    """Print the time from launch to the first response, with model load times"""
+    total = time.perf_counter() - started_at
+    models = " | ".join(f"{name} {secs:.1f}s" for name, secs in sorted(load_times.items()))
+    print(f"🚀 Time to first response: {total:.1f}s since launch")
+    if models:
+        print(f"   model load times: {models}")
+    print()
+
+
+def main(started_at=None, session_id=SESSION_ID):
+    """
+    Run the interactive chat loop.
+
+    Args:
+        started_at (float, optional): time.perf_counter() at launch; when set,
+            the time to the first response is reported after the first turn.
+        session_id (str, optional): Session the turns belong to; None answers
+            every turn on its own, using the prompt and response caches.
+    """
     print("🚗 Mercedes-Benz AI Assistant (type 'exit' to quit)\n")
 
     while True:
@@ -21,8 +75,10 @@ def main():
 
         # Process valid input
         try:
-            response = handle_user_input(user_input)
-            print(f"\n🤖 Assistant: {response}\n")
+            stream_response(user_input, session_id)
+            if started_at is not None:
+                report_first_response(started_at)
+                started_at = None
         except Exception as e:
             print(f"\n❌ Error: {e}")
             print("\n🤖 Assistant: I apologize for the inconvenience. Let me know how I can assist you with our Mercedes-Benz vehicles.\n")
@@ -1,5 +1,6 @@
 # run.py
 
+import argparse
 import os
 import sys
 import time
@@ -32,39 +33,66 @@ def suppress_output():
         null_stderr.close()
 
 
-def show_loading_animation(duration=5):
-    """Show a simple loading animation for the specified duration"""
+def show_loading_animation(loaded, total):
+    """Show a loading animation until all `total` models appear in `loaded`"""
+    # Write to the real terminal, stdout may be suppressed while models load
+    out = sys.__stdout__
     os.system('cls' if os.name == 'nt' else 'clear')
-    print("🚗 Mercedes-Benz AI Assistant")
-    print("⏳ Loading model, please wait...")
+    out.write("🚗 Mercedes-Benz AI Assistant\n")
+    out.write("⏳ Loading models, please wait...\n")
 
     animation_chars = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-    start_time = time.time()
 
-    while time.time() - start_time < duration:
+    while len(loaded) < total:
         for char in animation_chars:
-            sys.stdout.write(f"\r{char} Loading Phi-2 model...")
-            sys.stdout.flush()
+            last = f" (last: {loaded[-1]})" if loaded else ""
+            out.write(f"\r{char} Loaded {len(loaded)}/{total} models{last}   ")
+            out.flush()
             time.sleep(0.1)
+            if len(loaded) >= total:
+                break
+    out.write("\n")
 
 
 def main():
     """Launch the Mercedes Sales Assistant with suppressed logs"""
-    # Show loading animation
-    show_loading_animation()
-
-    # Import and initialize in quiet mode
+    parser = argparse.ArgumentParser(description="Mercedes-Benz AI Assistant")
+    parser.add_argument(
+        "--fast-start", action="store_true",
+        help="Open the chat right away, load models in the background and "
+             "report the time to first response per model")
+    parser.add_argument(
+        "--no-session", action="store_true",
+        help="Answer every message on its own instead of as one conversation; "
+             "keeps the per-intent prompt cache and the response cache")
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+
+    # Importing is cheap, models are loaded lazily
     with suppress_output():
-        from cli.chat_cli import main as chat_main
+        from cli.chat_cli import SESSION_ID, main as chat_main
+        from app.chat_engine import MODEL_LOADERS, start_warm_up
+
+    session_id = None if args.no_session else SESSION_ID
 
-        # Pre-load the LLM to avoid logs later
-        from app.llm_backend import llm
+    if args.fast_start:
+        start_warm_up()
+        os.system('cls' if os.name == 'nt' else 'clear')
+        chat_main(started_at=start_time, session_id=session_id)
+        return
+
+    # Load all models in parallel, animating until they are ready
+    loaded = []
+    with suppress_output():
+        warm_up_thread = start_warm_up(on_loaded=loaded.append)
+        show_loading_animation(loaded, len(MODEL_LOADERS))
+        warm_up_thread.join()
 
     # Clear screen and launch the actual CLI
     os.system('cls' if os.name == 'nt' else 'clear')
 
     # Run the chat CLI
-    chat_main()
+    chat_main(session_id=session_id)
 
 
 if __name__ == "__main__":
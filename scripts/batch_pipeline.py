@@ -0,0 +1,160 @@
+# scripts/batch_pipeline.py
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.chat_engine import (EMPTY_INPUT_RESPONSE, ERROR_RESPONSE, analyze_batch,
+                             generate_prompt_parts)
+from app.llm_backend import generate
+from app.llm_pool import LLMPool
+
+
+def read_messages(path, text_field):
+    """Yield the JSON records of a JSONL file one at a time, skipping bad lines"""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Warning: Invalid JSON on line {line_number}, skipped")
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get(text_field), str):
+                print(f"Warning: No \"{text_field}\" string on line {line_number}, skipped")
+                continue
+            yield record
+
+
+def generate_responses(messages, analyses, max_tokens, pool=None):
+    """One response per message, generated on the pool workers in parallel if given"""
+    responses = [None] * len(messages)
+    prompts = {}
+    for i, (message, analysis) in enumerate(zip(messages, analyses)):
+        if not message.strip():
+            responses[i] = EMPTY_INPUT_RESPONSE
+            continue
+        prompts[i] = generate_prompt_parts(
+            message, analysis["intent"]["label"], analysis["sentiment"]["label"],
+            analysis["chunks"])
+
+    # Queue every prompt first so all pool workers stay busy
+    futures = {}
+    if pool is not None:
+        futures = {i: pool.submit(prefix + suffix, max_tokens=max_tokens, prefix=prefix)
+                   for i, (prefix, suffix) in prompts.items()}
+
+    for i, (prefix, suffix) in prompts.items():
+        try:
+            if pool is not None:
+                responses[i] = futures[i].result()
+            else:
+                responses[i] = generate(prefix + suffix, max_tokens=max_tokens, prefix=prefix)
+        except Exception as e:
+            print(f"Error generating a response: {e}")
+            responses[i] = ERROR_RESPONSE
+    return responses
+
+
+def run(input_path, output_path, text_field="text", chunk_size=256, batch_size=16,
+        respond=True, max_tokens=256, pool=None):
+    """
+    Classify, retrieve for and answer every message of a JSONL file
+
+    Messages are read and processed `chunk_size` at a time and the results
+    appended to the output as each chunk finishes, so memory use does not
+    grow with the input. Each output line is the input record plus the
+    intent, sentiment, retrieved chunks and (if respond) the response.
+
+    Returns:
+        dict: Message count, total seconds and per-stage seconds
+    """
+    stats = {"messages": 0, "generation_ms": 0.0}
+    timings = {}
+    start = time.perf_counter()
+
+    records = read_messages(input_path, text_field)
+    with open(output_path, "w") as out:
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            messages = [record[text_field] for record in chunk]
+            analyses = analyze_batch(messages, batch_size, timings)
+
+            responses = [None] * len(chunk)
+            if respond:
+                generation_start = time.perf_counter()
+                responses = generate_responses(messages, analyses, max_tokens, pool)
+                stats["generation_ms"] += (time.perf_counter() - generation_start) * 1000
+
+            for record, analysis, response in zip(chunk, analyses, responses):
+                result = {
+                    **record,
+                    "intent": analysis["intent"]["label"],
+                    "intent_confidence": analysis["intent"]["confidence"],
+                    "sentiment": analysis["sentiment"]["label"],
+                    "sentiment_score": analysis["sentiment"]["score"],
+                    "chunks": analysis["chunks"],
+                }
+                if respond:
+                    result["response"] = response
+                out.write(json.dumps(result) + "\n")
+            out.flush()
+
+            stats["messages"] += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{stats['messages']} messages, {stats['messages'] / elapsed:.1f} msg/s")
+
+    stats["seconds"] = time.perf_counter() - start
+    stats.update(timings)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Classify, retrieve for and answer logged customer messages in batches")
+    parser.add_argument("input", type=Path, help="JSONL file of message records")
+    parser.add_argument("output", type=Path, help="JSONL file the results are written to")
+    parser.add_argument("--text-field", default="text",
+                        help="Record field holding the message (default: text)")
+    parser.add_argument("--chunk-size", type=int, default=256,
+                        help="Messages read and processed at a time")
+    parser.add_argument("--batch-size", type=int, default=16,
+                        help="Messages per intent/sentiment forward pass")
+    parser.add_argument("--no-generate", dest="respond", action="store_false",
+                        help="Only classify and retrieve, do not generate responses")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--llm-workers", type=int, default=1,
+                        help="llama.cpp worker processes generating in parallel")
+    args = parser.parse_args()
+
+    pool = None
+    if args.respond and args.llm_workers > 1:
+        print(f"Starting {args.llm_workers} LLM workers...")
+        pool = LLMPool(args.llm_workers).start()
+    try:
+        stats = run(args.input, args.output, args.text_field, args.chunk_size,
+                    args.batch_size, args.respond, args.max_tokens, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    n = stats["messages"]
+    print(f"\n✅ Processed {n} messages in {stats['seconds']:.1f}s "
+          f"({n / stats['seconds'] if stats['seconds'] else 0:.1f} msg/s) -> {args.output}")
+    for stage in ("intent_ms", "sentiment_ms", "retrieval_ms", "generation_ms"):
+        total = stats.get(stage, 0.0)
+        print(f"  {stage[:-3]:>10}: {total / 1000:8.1f}s total, "
+              f"{total / n if n else 0:8.1f} ms/message")
+
+
+if __name__ == "__main__":
+    main()
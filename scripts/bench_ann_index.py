@@ -0,0 +1,94 @@
+# scripts/bench_ann_index.py
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts.embed_chunks import DEFAULT_INDEX_CONFIG, build_faiss_index
+
+
+def clustered_vectors(rng, centers, n, noise=0.3):
+    """Vectors drawn around random cluster centers, closer to real embeddings than pure noise"""
+    labels = rng.integers(0, len(centers), n)
+    vectors = centers[labels] + noise * rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return vectors.astype(np.float32)
+
+
+def set_search_param(index, index_type, value):
+    """Set nprobe (IVF) or efSearch (HNSW) on an index built by embed_chunks"""
+    if index_type == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efSearch = value
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        index.nprobe = value
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall@k, QPS and memory of each FAISS index type against the flat index")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivf_flat", "ivf_pq"])
+    parser.add_argument("--nlist", type=int, default=4096)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, args.n // 1000), args.dim), dtype=np.float32)
+    vectors = clustered_vectors(rng, centers, args.n)
+    queries = clustered_vectors(rng, centers, args.queries)
+
+    # Ground truth from exact search
+    flat = faiss.IndexFlatL2(args.dim)
+    flat.add(vectors)
+    _, truth = flat.search(queries, args.k)
+    del flat
+
+    print(f"\n{'index':>9} {'param':>14} {'build (s)':>10} {'memory (MB)':>12} "
+          f"{'recall@' + str(args.k):>10} {'QPS':>10}")
+    for index_type in args.types:
+        config = {**DEFAULT_INDEX_CONFIG, "type": index_type,
+                  "nlist": args.nlist, "pq_m": args.pq_m}
+        start = time.perf_counter()
+        index = build_faiss_index(vectors, config=config)
+        build_time = time.perf_counter() - start
+        memory_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        if index_type == "hnsw":
+            settings = [("efSearch", v) for v in args.ef_search]
+        elif index_type in ("ivf_flat", "ivf_pq"):
+            settings = [("nprobe", v) for v in args.nprobe]
+        else:
+            settings = [("-", None)]
+
+        for name, value in settings:
+            if value is not None:
+                set_search_param(index, index_type, value)
+            start = time.perf_counter()
+            _, found = index.search(queries, args.k)
+            qps = len(queries) / (time.perf_counter() - start)
+            param = "-" if value is None else f"{name}={value}"
+            print(f"{index_type:>9} {param:>14} {build_time:>10.1f} {memory_mb:>12.1f} "
+                  f"{recall_at_k(found, truth):>10.3f} {qps:>10.0f}")
+
+    print("\nPersist the chosen setting with e.g. "
+          "`python scripts/embed_chunks.py --index-type ivf_flat --nprobe 32`")
+
+
+if __name__ == "__main__":
+    main()
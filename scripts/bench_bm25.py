@@ -0,0 +1,104 @@
+# scripts/bench_bm25.py
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.bm25 import BM25Index
+from bench.corpus import CHUNK_BODY_STYLES, POWERTRAINS, chunk_text
+
+
+def write_docstore(path, n_docs):
+    with open(path, "w") as f:
+        for i in range(n_docs):
+            f.write(json.dumps({"id": f"model_{i}", "text": chunk_text(i)}) + "\n")
+
+
+def make_queries(n_docs, n_queries, seed=0):
+    """(query, target row) pairs asking about one specific document"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.choice(n_docs, size=n_queries, replace=False).tolist():
+        body = CHUNK_BODY_STYLES[i % len(CHUNK_BODY_STYLES)].lower()
+        powertrain = POWERTRAINS[i % len(POWERTRAINS)].lower()
+        queries.append((f"what is the price of the {powertrain} {body} model {i}", i))
+    return queries
+
+
+def scan_search(docstore_path, query, top_k):
+    """The previous fallback_search: re-read the docstore and count substring hits"""
+    documents = []
+    with open(docstore_path) as f:
+        for line in f:
+            documents.append(json.loads(line))
+
+    query_terms = query.lower().split()
+    results = []
+    for row, doc in enumerate(documents):
+        text = doc["text"].lower()
+        score = sum(1 for term in query_terms if term in text)
+        if score > 0:
+            results.append((row, score))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return [row for row, _ in results[:top_k]]
+
+
+def summarize(name, latencies_ms, hits, n_queries):
+    p50, p95 = np.percentile(latencies_ms, [50, 95])
+    print(f"{name:>14} {p50:>10.2f} {p95:>10.2f} {hits / n_queries:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="BM25 index vs the docstore-rescanning keyword fallback: latency and recall")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=3,
+                        help="Queries run through the slow rescanning search")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = make_queries(args.docs, args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        docstore_path = Path(tmp) / "docstore.jsonl"
+        bm25_path = Path(tmp) / "bm25.npz"
+        print(f"Writing {args.docs} synthetic chunks...")
+        write_docstore(docstore_path, args.docs)
+
+        start = time.perf_counter()
+        BM25Index.build(chunk_text(i) for i in range(args.docs)).save(bm25_path)
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        bm25 = BM25Index.load(bm25_path)
+        load_s = time.perf_counter() - start
+        print(f"BM25 index: built in {build_s:.1f}s, {bm25_path.stat().st_size / 1e6:.0f} MB, "
+              f"loaded in {load_s:.2f}s")
+
+        print(f"\n{'search':>14} {'p50 (ms)':>10} {'p95 (ms)':>10} {'recall@' + str(args.top_k):>10}")
+        latencies, hits = [], 0
+        for query, target in queries:
+            t0 = time.perf_counter()
+            rows = [row for row, _ in bm25.search(query, args.top_k)]
+            latencies.append((time.perf_counter() - t0) * 1000)
+            hits += target in rows
+        summarize("bm25", latencies, hits, len(queries))
+
+        latencies, hits = [], 0
+        for query, target in queries[:args.scan_queries]:
+            t0 = time.perf_counter()
+            rows = scan_search(docstore_path, query, args.top_k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            hits += target in rows
+        summarize("rescan (old)", latencies, hits, min(args.scan_queries, len(queries)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# scripts/bench_csv2chunks.py
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from scripts.csv2chunks import convert_csv
+
+BODY_STYLES = np.array(["SUV", "Sedan", "Coupe", "Cabriolet", "Hatchback", "Estate"])
+POWERTRAINS = np.array(["Petrol", "Diesel", "Hybrid", "Electric"])
+
+
+def write_synthetic_csv(path, n_rows):
+    """Inventory-export-shaped CSV with the columns csv2chunks expects"""
+    rng = np.random.default_rng(0)
+    for start in range(0, n_rows, 1_000_000):
+        n = min(1_000_000, n_rows - start)
+        pd.DataFrame({
+            "model_name": "Mercedes Model " + pd.Series(np.arange(start, start + n)).astype(str),
+            "body_style": BODY_STYLES[rng.integers(0, len(BODY_STYLES), n)],
+            "powertrain": POWERTRAINS[rng.integers(0, len(POWERTRAINS), n)],
+            "number_of_seats": rng.integers(2, 8, n),
+            "starting_price_aed": rng.integers(150_000, 1_000_000, n),
+        }).to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def convert_iterrows(csv_path, output_path):
+    """The previous csv2chunks: one f-string and one json.dumps per row"""
+    df = pd.read_csv(csv_path)
+    chunks = [
+        {
+            "id": f"{row['model_name'].strip().lower().replace(' ', '_')}",
+            "text": (
+                f"Model: {row['model_name']} | "
+                f"Body Style: {row['body_style']} | "
+                f"Powertrain: {row['powertrain']} | "
+                f"Seats: {row['number_of_seats']} | "
+                f"Starting Price: AED {row['starting_price_aed']}"
+            )
+        }
+        for _, row in df.iterrows()
+    ]
+    with open(output_path, "w") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+    return len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput of the streaming csv2chunks against the iterrows version")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--baseline-rows", type=int, default=200_000,
+                        help="Rows timed with iterrows (extrapolated to --rows)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "models.csv"
+        baseline_csv = Path(tmp) / "baseline.csv"
+        print(f"Writing a {args.rows}-row CSV...")
+        write_synthetic_csv(csv_path, args.rows)
+        write_synthetic_csv(baseline_csv, min(args.baseline_rows, args.rows))
+
+        start = time.perf_counter()
+        n = convert_iterrows(baseline_csv, Path(tmp) / "baseline.jsonl")
+        baseline_rate = n / (time.perf_counter() - start)
+
+        print(f"\n{'converter':>18} {'rows/s':>12} {'time for ' + str(args.rows):>18}")
+        print(f"{'iterrows':>18} {baseline_rate:>12,.0f} {args.rows / baseline_rate:>17.1f}s "
+              f"(extrapolated from {n} rows)")
+
+        output_path = Path(tmp) / "docstore.jsonl"
+        for workers in args.workers:
+            start = time.perf_counter()
+            n = convert_csv(csv_path, output_path, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{'streaming x' + str(workers):>18} {n / elapsed:>12,.0f} {elapsed:>17.1f}s "
+                  f"({baseline_rate and (n / elapsed) / baseline_rate:.0f}x)")
+
+        # Same output as the old converter on the rows both handled
+        with open(Path(tmp) / "baseline.jsonl") as old:
+            convert_csv(baseline_csv, output_path)
+            with open(output_path) as new:
+                assert old.read() == new.read(), "outputs differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# scripts/bench_embedding.py
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from bench.corpus import make_chunks
+from scripts.embed_chunks import (EMBED_BATCH_SIZE, MODEL_NAME, EmbeddingCache,
+                                  TextEmbedder, chunk_hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Embedding throughput (texts/s and texts/s per core) by worker count and batch size")
+    parser.add_argument("--texts", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[EMBED_BATCH_SIZE])
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    texts = [chunk["text"] for chunk in make_chunks(args.texts)]
+    cores = os.cpu_count() or 1
+
+    results = []
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            with TextEmbedder(args.model, workers, batch_size) as embedder:
+                embedder.encode(texts[:batch_size])  # warm up
+                embedder.n_texts, embedder.seconds = 0, 0.0
+                embedder.encode(sorted(texts, key=len, reverse=True))
+            results.append((workers, batch_size, embedder.n_texts / embedder.seconds))
+
+    # Checkpointing overhead: writing the embeddings as one cache shard
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(tmp)
+        vectors = np.zeros((len(texts), 768), dtype=np.float32)
+        start = time.perf_counter()
+        cache.add([chunk_hash(t, args.model) for t in texts], vectors)
+        checkpoint_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n{'workers':>8} {'batch':>6} {'texts/s':>10} {'texts/s/core':>13}")
+    for workers, batch_size, rate in results:
+        # One process uses every core through torch threads; a pool splits them
+        print(f"{workers:>8} {batch_size:>6} {rate:>10.1f} {rate / cores:>13.1f}")
+    print(f"\nCheckpointing {len(texts)} embeddings took {checkpoint_ms:.0f} ms "
+          f"({cores} cores available)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# scripts/bench_incremental_index.py
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from bench.corpus import make_chunks
+from scripts.embed_chunks import rebuild_index, update_index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time a one-row incremental index update against a full rebuild")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "index_path": Path(tmp) / "index.bin",
+            "id_map_path": Path(tmp) / "id_map.json",
+            "hashes_path": Path(tmp) / "chunk_hashes.json",
+            "cache_dir": Path(tmp) / "embedding_cache",
+        }
+
+        start = time.perf_counter()
+        rebuild_index(chunks, **paths)
+        full = time.perf_counter() - start
+
+        # A single price change in the catalog
+        chunks[args.rows // 2]["text"] = chunks[args.rows // 2]["text"].replace(
+            "Starting Price: AED ", "Starting Price: AED 1")
+        start = time.perf_counter()
+        update_index(chunks, **paths)
+        incremental = time.perf_counter() - start
+
+    print(f"\n{args.rows} rows: full rebuild {full:.1f}s, "
+          f"one-row incremental update {incremental:.2f}s "
+          f"({full / incremental:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
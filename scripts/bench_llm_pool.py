@@ -0,0 +1,58 @@
+# scripts/bench_llm_pool.py
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.llm_pool import LLMPool
+
+PROMPTS = [
+    "You are a helpful AI assistant for Mercedes-Benz Gargash.\nUser message: \"How much is the G-Class?\"\nAssistant:",
+    "You are a helpful AI assistant for Mercedes-Benz Gargash.\nUser message: \"Compare the GLC and the GLE.\"\nAssistant:",
+    "You are a helpful AI assistant for Mercedes-Benz Gargash.\nUser message: \"Can I test drive the EQS?\"\nAssistant:",
+    "You are a helpful AI assistant for Mercedes-Benz Gargash.\nUser message: \"Which SUV has seven seats?\"\nAssistant:",
+]
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        description="CPU-only LLM throughput for 1..N worker processes")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[n for n in (1, 2, 4, 8, 16) if n <= cores])
+    parser.add_argument("--cores", type=int, default=cores,
+                        help="Cores split evenly between the workers")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'threads':>8} {'startup (s)':>12} {'req/s':>8} {'speedup':>8}")
+    baseline = None
+    for n_workers in args.workers:
+        threads = max(1, args.cores // n_workers)
+
+        start = time.perf_counter()
+        with LLMPool(n_workers, threads, n_gpu_layers=0) as pool:
+            startup = time.perf_counter() - start
+
+            # Same sampling settings for every run so outputs are comparable
+            start = time.perf_counter()
+            futures = [pool.submit(PROMPTS[i % len(PROMPTS)],
+                                   max_tokens=args.max_tokens, temperature=0.0)
+                       for i in range(args.requests)]
+            for future in futures:
+                future.result()
+            throughput = args.requests / (time.perf_counter() - start)
+
+        baseline = baseline or throughput
+        print(f"{n_workers:>8} {threads:>8} {startup:>12.1f} "
+              f"{throughput:>8.2f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/bench_matcher.py
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.attribute_index import AttributeIndex
+from app.docstore import parse_metadata
+from app.matcher import PatternMatcher
+from bench.corpus import make_corpus
+
+# The classifier's keyword table (see IntentSentimentClassifier.intent_keywords)
+INTENT_KEYWORDS = {
+    "compare_models": ["compare", "difference", "vs", "versus"],
+    "test_drive": ["test drive", "book drive", "schedule drive"],
+    "price_inquiry": ["price", "cost", "how much", "financing", "payment"],
+    "availability": ["available", "in stock", "delivery", "waitlist"],
+    "booking": ["appointment", "schedule", "callback", "visit"],
+    "after_sales": ["service", "warranty", "maintenance"],
+    "exit": ["bye", "goodbye", "end", "leave"]
+}
+
+
+def make_docs(n_models):
+    """Docstore entries with `n_models` distinct model names"""
+    prefixes = ["A", "C", "E", "S", "CLA", "CLE", "GLA", "GLB", "GLC", "GLE", "GLS", "G",
+                "EQA", "EQB", "EQE", "EQS", "AMG GT", "SL", "Maybach S"]
+    docs = []
+    for i in range(n_models):
+        text = (f"Model: {prefixes[i % len(prefixes)]} {100 + i // len(prefixes)} | "
+                f"Body Style: SUV | Powertrain: Petrol | Seats: 5 | Starting Price: AED {150000 + i}")
+        docs.append({"id": str(i), "text": text, "metadata": parse_metadata(text)})
+    return docs
+
+
+def scan_models(model_names, text):
+    """The per-document substring loop the automaton replaces"""
+    text = text.lower()
+    return [pos for pos, name in enumerate(model_names) if name and name in text]
+
+
+def scan_keywords(text):
+    text = text.lower()
+    return [intent for intent, keywords in INTENT_KEYWORDS.items() if any(k in text for k in keywords)]
+
+
+def time_per_message(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (rounds * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Model-name and intent-keyword extraction: substring loops vs Aho-Corasick")
+    parser.add_argument("--models", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--messages", type=int, default=90)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = [m["text"] for m in make_corpus(args.messages)]
+
+    keyword_matcher = PatternMatcher(
+        ((k, intent) for intent, keywords in INTENT_KEYWORDS.items() for k in keywords),
+        word_boundaries=False)
+    loop_us = time_per_message(scan_keywords, messages, args.rounds)
+    matcher_us = time_per_message(keyword_matcher.values, messages, args.rounds)
+    print(f"intent keywords: loop {loop_us:.1f} us/message, automaton {matcher_us:.1f} us/message\n")
+
+    print(f"{'models':>8} {'build (ms)':>11} {'loop (us)':>10} {'automaton (us)':>15}")
+    for n_models in args.models:
+        index = AttributeIndex(make_docs(n_models))
+        start = time.perf_counter()
+        index.model_matcher
+        build_ms = (time.perf_counter() - start) * 1000
+
+        loop_us = time_per_message(lambda m: scan_models(index.model_names, m), messages, args.rounds)
+        matcher_us = time_per_message(index.mentioned_models, messages, args.rounds)
+        print(f"{n_models:>8} {build_ms:>11.1f} {loop_us:>10.1f} {matcher_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# scripts/bench_mmap_store.py
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.docstore import write_binary_docstore
+from bench.corpus import make_chunks
+
+
+def build_store(out_dir, n_docs, dim):
+    """Write both the JSON and the memory-mappable layout of a synthetic corpus"""
+    rng = np.random.default_rng(0)
+    paths = {
+        "index": out_dir / "index.bin",
+        "id_map": out_dir / "id_map.json",
+        "docstore": out_dir / "docstore.jsonl",
+        "rows": out_dir / "faiss_rows.npy",
+        "docstore_bin": out_dir / "docstore.bin",
+    }
+
+    chunks = make_chunks(n_docs)
+    with open(paths["docstore"], "w") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+    write_binary_docstore(chunks, paths["docstore_bin"])
+
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    for start in range(0, n_docs, 100_000):
+        batch = rng.standard_normal((min(100_000, n_docs - start), dim), dtype=np.float32)
+        index.add_with_ids(batch, np.arange(start, start + len(batch), dtype=np.int64))
+    faiss.write_index(index, str(paths["index"]))
+
+    with open(paths["id_map"], "w") as f:
+        json.dump({str(i): chunk["id"] for i, chunk in enumerate(chunks)}, f)
+    np.save(paths["rows"], np.arange(n_docs, dtype=np.int64))
+    return paths
+
+
+def memory_kb():
+    """Resident, file-backed (shareable) and anonymous memory of this process"""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssFile", "RssAnon"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+
+def serve(paths, use_mmap, dim, top_k, results):
+    """One serving process: load a Retriever, answer a query, report memory"""
+    from app.query_interface import Retriever
+
+    start = time.perf_counter()
+    if use_mmap:
+        retriever = Retriever(paths["index"], paths["rows"], paths["docstore_bin"], mmap=True)
+    else:
+        retriever = Retriever(paths["index"], paths["id_map"], paths["docstore"])
+    retriever.refresh()
+    load_s = time.perf_counter() - start
+
+    q_vec = np.random.default_rng().standard_normal((1, dim), dtype=np.float32)
+    start = time.perf_counter()
+    retriever.search_vectors(q_vec, top_k)
+    query_ms = (time.perf_counter() - start) * 1000
+    results.put({"load_s": load_s, "query_ms": query_ms, **memory_kb()})
+
+
+def run(paths, use_mmap, n_procs, dim, top_k):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=serve, args=(paths, use_mmap, dim, top_k, results))
+             for _ in range(n_procs)]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold start and per-process memory of mmap vs in-memory Retriever loading")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building a {args.docs}-document store...")
+        paths = build_store(Path(tmp), args.docs, args.dim)
+
+        print(f"\n{'mode':>10} {'cold start (s)':>15} {'query (ms)':>11} "
+              f"{'RSS (MB)':>10} {'shared (MB)':>12} {'private (MB)':>13}")
+        for use_mmap in (False, True):
+            stats = run(paths, use_mmap, args.procs, args.dim, args.top_k)
+            mean = {key: np.mean([s[key] for s in stats]) for key in stats[0]}
+            print(f"{'mmap' if use_mmap else 'in-memory':>10} {mean['load_s']:>15.2f} "
+                  f"{mean['query_ms']:>11.1f} {mean['VmRSS'] / 1024:>10.0f} "
+                  f"{mean['RssFile'] / 1024:>12.0f} {mean['RssAnon'] / 1024:>13.0f}")
+
+    print(f"\nAverages over {args.procs} processes. File-backed (shared) pages are "
+          "counted once by the OS; private pages are paid per process.")
+
+
+if __name__ == "__main__":
+    main()
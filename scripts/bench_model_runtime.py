@@ -0,0 +1,119 @@
+# scripts/bench_model_runtime.py
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.model_runtime import MODEL_RUNTIMES
+from bench.corpus import make_chunks
+from scripts.bench_mmap_store import memory_kb
+from scripts.compare_intent_backends import SAMPLES_PATH, load_samples, percentile
+
+
+def timed(fn, items):
+    """Outputs of fn over items and the sorted per-item latencies (ms)"""
+    outputs, latencies = [], []
+    for item in items:
+        start = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, sorted(latencies)
+
+
+def run_runtime(runtime, texts, corpus, results):
+    """Load the three models on `runtime` in a fresh process and measure them"""
+    from app.intent_cls import IntentSentimentClassifier
+    from app.model_runtime import load_sentence_transformer
+    from app.query_interface import MODEL_NAME
+
+    rss_before = memory_kb()["VmRSS"]
+    start = time.perf_counter()
+    clf = IntentSentimentClassifier(intent_backend="zero_shot", runtime=runtime)
+    clf.load_intent_model()
+    clf.load_sentiment_model()
+    embedder = load_sentence_transformer(MODEL_NAME, runtime)
+    load_s = time.perf_counter() - start
+
+    intents, intent_ms = timed(lambda t: clf.classify_intent(t)["label"], texts)
+    sentiments, sentiment_ms = timed(lambda t: clf.classify_sentiment(t)["label"], texts)
+    vectors, embed_ms = timed(
+        lambda t: embedder.encode([t], normalize_embeddings=True)[0], texts)
+
+    results.put({
+        "runtime": runtime,
+        "load_s": load_s,
+        "memory_mb": (memory_kb()["VmRSS"] - rss_before) / 1024,
+        "intent_ms": percentile(intent_ms, 50),
+        "sentiment_ms": percentile(sentiment_ms, 50),
+        "embed_ms": percentile(embed_ms, 50),
+        "intents": intents,
+        "sentiments": sentiments,
+        "vectors": np.array(vectors),
+        # Documents are always embedded in fp32 by embed_chunks
+        "corpus": (embedder.encode(corpus, normalize_embeddings=True)
+                   if runtime == "torch" else None),
+    })
+
+
+def measure(runtime, texts, corpus):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=run_runtime, args=(runtime, texts, corpus, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def top_k(vectors, corpus, k):
+    return np.argsort(-(vectors @ corpus.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency, memory and agreement of each model runtime against fp32 PyTorch")
+    parser.add_argument("--samples", type=Path, default=SAMPLES_PATH)
+    parser.add_argument("--runtimes", nargs="+", default=list(MODEL_RUNTIMES),
+                        choices=MODEL_RUNTIMES)
+    parser.add_argument("--corpus", type=int, default=2_000,
+                        help="Synthetic documents used for retrieval agreement")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [sample["text"] for sample in load_samples(args.samples)]
+    corpus = [chunk["text"] for chunk in make_chunks(args.corpus)]
+
+    # fp32 PyTorch is the reference every other runtime is compared with
+    runtimes = ["torch"] + [r for r in args.runtimes if r != "torch"]
+    reference = measure("torch", texts, corpus)
+    reference_top = top_k(reference["vectors"], reference["corpus"], args.top_k)
+
+    print(f"\n{'runtime':>10} {'load (s)':>9} {'memory (MB)':>12} {'intent (ms)':>12} "
+          f"{'sentiment (ms)':>15} {'embed (ms)':>11} {'intent agr.':>12} "
+          f"{'sentiment agr.':>15} {'top-' + str(args.top_k) + ' overlap':>14}")
+    for runtime in runtimes:
+        result = reference if runtime == "torch" else measure(runtime, texts, corpus)
+        intent_agreement = np.mean([a == b for a, b in zip(result["intents"], reference["intents"])])
+        sentiment_agreement = np.mean(
+            [a == b for a, b in zip(result["sentiments"], reference["sentiments"])])
+        found = top_k(result["vectors"], reference["corpus"], args.top_k)
+        overlap = np.mean([len(set(f) & set(r)) / args.top_k
+                           for f, r in zip(found, reference_top)])
+        print(f"{runtime:>10} {result['load_s']:>9.1f} {result['memory_mb']:>12.0f} "
+              f"{result['intent_ms']:>12.1f} {result['sentiment_ms']:>15.1f} "
+              f"{result['embed_ms']:>11.1f} {intent_agreement:>12.1%} "
+              f"{sentiment_agreement:>15.1%} {overlap:>14.1%}")
+
+    print("\nMedian latencies per message over "
+          f"{len(texts)} samples from {args.samples}. Select a runtime with MODEL_RUNTIME=<runtime>.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# scripts/bench_prefix_cache.py
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import llm_backend
+from app.chat_engine import generate_prompt_parts
+
+SAMPLE_TURNS = [
+    ("price_inquiry", "How much is the G-Class?",
+     ["Model: G 63 | Body Style: SUV | Powertrain: Petrol | Seats: 5 | Starting Price: AED 933000"]),
+    ("compare_models", "What is the difference between the GLC and the GLE?",
+     ["Model: GLC 300 | Body Style: SUV | Powertrain: Petrol | Seats: 5 | Starting Price: AED 285000",
+      "Model: GLE 450 | Body Style: SUV | Powertrain: Hybrid | Seats: 7 | Starting Price: AED 410000"]),
+    ("test_drive", "Can I test drive the EQS this weekend?", []),
+    ("after_sales", "What does the warranty cover?", []),
+]
+
+
+def time_prefill(prefix, suffix, use_cache):
+    """Time a one-token generation, which is dominated by prompt prefill"""
+    if not use_cache:
+        # Forget the previous prompt so llama.cpp cannot reuse any of it
+        llm_backend.load_llm().reset()
+    start = time.perf_counter()
+    llm_backend.generate(prefix + suffix, max_tokens=1,
+                         prefix=prefix if use_cache else "")
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prompt prefill time with and without prefix state caching")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    turns = [(generate_prompt_parts(msg, intent, "POSITIVE", chunks), intent)
+             for intent, msg, chunks in SAMPLE_TURNS]
+
+    # Warm the prefix cache so only restores are timed
+    for (prefix, _), _ in turns:
+        llm_backend.restore_prefix(prefix)
+
+    print(f"{'intent':>15} {'prefix tok':>11} {'prompt tok':>11} "
+          f"{'no cache (ms)':>14} {'cached (ms)':>12}")
+    for (prefix, suffix), intent in turns:
+        n_prefix = len(llm_backend.load_llm().tokenize(prefix.encode("utf-8"), special=True))
+        n_prompt = len(llm_backend.load_llm().tokenize((prefix + suffix).encode("utf-8"), special=True))
+
+        without = sorted(time_prefill(prefix, suffix, False) for _ in range(args.rounds))
+        with_cache = sorted(time_prefill(prefix, suffix, True) for _ in range(args.rounds))
+        print(f"{intent:>15} {n_prefix:>11} {n_prompt:>11} "
+              f"{without[len(without) // 2]:>14.1f} {with_cache[len(with_cache) // 2]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# scripts/bench_retriever.py
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.query_interface import Retriever, load_docstore
+from bench.corpus import make_chunks
+
+
+def build_corpus(out_dir, n_docs, dim):
+    """Write a synthetic docstore, FAISS index and id map of n_docs documents"""
+    rng = np.random.default_rng(0)
+    paths = {
+        "docstore": out_dir / "docstore.jsonl",
+        "index": out_dir / "index.bin",
+        "id_map": out_dir / "id_map.json",
+    }
+
+    chunks = make_chunks(n_docs)
+    with open(paths["docstore"], "w") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+
+    embeddings = rng.standard_normal((n_docs, dim), dtype=np.float32)
+    index = faiss.IndexFlatL2(dim)
+    index.add(embeddings)
+    faiss.write_index(index, str(paths["index"]))
+
+    with open(paths["id_map"], "w") as f:
+        json.dump({str(i): chunk["id"] for i, chunk in enumerate(chunks)}, f)
+
+    return paths
+
+
+def search_reloading(paths, q_vec, top_k):
+    """The previous search(): reload index, id map and docstore per query"""
+    index = faiss.read_index(str(paths["index"]))
+    with open(paths["id_map"]) as f:
+        id_map = json.load(f)
+    docstore = load_docstore(paths["docstore"])
+
+    D, I = index.search(q_vec, top_k)
+    return [docstore[id_map[str(i)]] for i in I[0]
+            if str(i) in id_map and id_map[str(i)] in docstore]
+
+
+def time_per_query(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-query retrieval latency with and without a resident Retriever")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[40, 4_000, 400_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50,
+                        help="Queries timed against the resident Retriever")
+    parser.add_argument("--reload-queries", type=int, default=3,
+                        help="Queries timed against the reload-per-query path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'docs':>10} {'reload (ms)':>14} {'resident (ms)':>14} {'speedup':>9} "
+          f"{'criteria (ms)':>14}")
+
+    for n_docs in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = build_corpus(Path(tmp), n_docs, args.dim)
+            queries = rng.standard_normal(
+                (args.queries, 1, args.dim), dtype=np.float32)
+
+            before = time_per_query(
+                lambda q: search_reloading(paths, q, args.top_k),
+                queries[:args.reload_queries])
+
+            retriever = Retriever(paths["index"], paths["id_map"], paths["docstore"])
+            retriever.refresh()
+            after = time_per_query(
+                lambda q: retriever.search_vectors(q, args.top_k), queries)
+
+            # "SUVs under AED 400,000 with 7 seats" through the attribute index
+            criteria = time_per_query(
+                lambda q: retriever.get_models_by_criteria(
+                    {"body style": "SUV", "seats": "7"}, max_price=400_000),
+                queries)
+
+            print(f"{n_docs:>10} {before:>14.2f} {after:>14.3f} {before / after:>8.0f}x "
+                  f"{criteria:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
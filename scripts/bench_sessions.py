@@ -0,0 +1,88 @@
+# scripts/bench_sessions.py
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import llm_backend
+from app.chat_engine import SYSTEM_PROMPT, generate_turn_block
+from app.sessions import SessionStore
+
+# A ten-turn conversation with follow-ups that only make sense in context
+CONVERSATION = [
+    ("exploratory", "I'm looking for a family SUV.",
+     ["Model: GLC 300 | Body Style: SUV | Powertrain: Petrol | Seats: 5 | Starting Price: AED 285000",
+      "Model: GLE 450 | Body Style: SUV | Powertrain: Hybrid | Seats: 7 | Starting Price: AED 410000"]),
+    ("informed", "And what about the 7-seater?",
+     ["Model: GLE 450 | Body Style: SUV | Powertrain: Hybrid | Seats: 7 | Starting Price: AED 410000"]),
+    ("price_inquiry", "How much is it?",
+     ["Model: GLE 450 | Body Style: SUV | Powertrain: Hybrid | Seats: 7 | Starting Price: AED 410000"]),
+    ("compare_models", "How does it compare to the GLS?",
+     ["Model: GLS 580 | Body Style: SUV | Powertrain: Petrol | Seats: 7 | Starting Price: AED 560000"]),
+    ("availability", "Is the cheaper one in stock?", []),
+    ("after_sales", "What does the warranty cover?", []),
+    ("price_inquiry", "Are there financing offers on it?", []),
+    ("test_drive", "Can I test drive it this weekend?", []),
+    ("booking", "Saturday morning works for me.", []),
+    ("exit", "Thanks, that's all.", []),
+]
+
+
+def run_conversation(use_snapshots, max_tokens):
+    """
+    Play CONVERSATION through one session.
+
+    Returns:
+        list: (prompt tokens, prefill ms) per turn
+    """
+    store = SessionStore(spill_dir=None, header=SYSTEM_PROMPT)
+    session = store.get("bench")
+    llm = llm_backend.load_llm()
+    results = []
+    for intent, message, chunks in CONVERSATION:
+        block = generate_turn_block(message, intent, "POSITIVE", chunks)
+        prompt = session.transcript + block
+        state = store.load_snapshot(session) if use_snapshots else None
+        if state is None:
+            # Nothing of the earlier turns may be reused
+            llm.reset()
+
+        start = time.perf_counter()
+        first = None
+        pieces = []
+        # Greedy, so both runs see the same responses
+        for piece in llm_backend.generate_stream(prompt, max_tokens=max_tokens,
+                                                 temperature=0.0, state=state):
+            if first is None:
+                first = time.perf_counter()
+            pieces.append(piece)
+        prefill_ms = ((first or time.perf_counter()) - start) * 1000
+
+        text = f"{block} {''.join(pieces)}\n"
+        store.record_turn(session, text, llm_backend.count_tokens(text),
+                          llm_backend.save_state() if use_snapshots else None)
+        results.append((llm_backend.count_tokens(prompt), prefill_ms))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prefill time per turn of a multi-turn session with and without KV snapshots")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    llm_backend.load_llm()
+    without = run_conversation(False, args.max_tokens)
+    with_snapshots = run_conversation(True, args.max_tokens)
+
+    print(f"{'turn':>5} {'prompt tok':>11} {'no snapshot (ms)':>17} {'snapshot (ms)':>14}")
+    for turn, ((n_tokens, full_ms), (_, snapshot_ms)) in enumerate(zip(without, with_snapshots), 1):
+        print(f"{turn:>5} {n_tokens:>11} {full_ms:>17.1f} {snapshot_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
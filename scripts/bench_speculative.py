@@ -0,0 +1,105 @@
+# scripts/bench_speculative.py
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import llm_backend
+from app.chat_engine import RETRIEVAL_INTENTS, generate_prompt_parts
+from app.query_interface import search
+from bench.corpus import make_corpus
+
+
+def load(draft_tokens, ngram):
+    """(Re)load the LLM with prompt-lookup drafting, or without if draft_tokens is 0"""
+    llm_backend.llm = None
+    llm_backend._prefix_states.clear()
+    llm_backend.LLM_DRAFT = "prompt_lookup" if draft_tokens else "none"
+    llm_backend.LLM_DRAFT_TOKENS = draft_tokens
+    llm_backend.LLM_DRAFT_NGRAM = ngram
+    return llm_backend.load_llm()
+
+
+def time_decode(llm, prompt, max_tokens):
+    """
+    Greedy-decode `prompt` and time prefill and decode separately.
+
+    Returns:
+        tuple: (generated tokens, decode seconds, draft steps, drafted tokens)
+    """
+    before = llm_backend.draft_stats() or {"steps": 0, "drafted": 0}
+    first = None
+    pieces = []
+    for chunk in llm(prompt, max_tokens=max_tokens, temperature=0.0,
+                     stop=llm_backend.STOP_SEQUENCES, stream=True):
+        if first is None:
+            first = time.perf_counter()
+        pieces.append(chunk["choices"][0]["text"])
+    end = time.perf_counter()
+    after = llm_backend.draft_stats() or {"steps": 0, "drafted": 0}
+
+    n_tokens = len(llm.tokenize("".join(pieces).encode("utf-8"), add_bos=False))
+    return (n_tokens, end - (first or end), after["steps"] - before["steps"],
+            after["drafted"] - before["drafted"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decode tokens/sec and draft acceptance rate of prompt-lookup "
+                    "speculative decoding per intent")
+    parser.add_argument("--draft-tokens", type=int, nargs="+", default=[0, 4, 10],
+                        help="Draft lengths to compare (0 = no speculative decoding)")
+    parser.add_argument("--ngram", type=int, default=llm_backend.LLM_DRAFT_NGRAM,
+                        help="Longest n-gram matched against the prompt")
+    parser.add_argument("--per-intent", type=int, default=3, help="Messages per intent")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.per_intent * 9)
+    prompts = defaultdict(list)
+    for message in corpus:
+        chunks = search(message["text"]) if message["intent"] in RETRIEVAL_INTENTS else []
+        prefix, suffix = generate_prompt_parts(message["text"], message["intent"], "POSITIVE", chunks)
+        prompts[message["intent"]].append(prefix + suffix)
+
+    baseline = {}
+    for draft_tokens in args.draft_tokens:
+        llm = load(draft_tokens, args.ngram)
+        llm(next(iter(prompts.values()))[0], max_tokens=8, temperature=0.0)  # warm-up
+
+        label = f"draft {draft_tokens}" if draft_tokens else "no drafting"
+        print(f"\n{label}:")
+        print(f"{'intent':>15} {'tokens':>7} {'decode tok/s':>13} {'speedup':>8} {'acceptance':>11}")
+        totals = [0, 0.0, 0, 0]
+        for intent, intent_prompts in prompts.items():
+            sums = [0, 0.0, 0, 0]
+            for prompt in intent_prompts:
+                llm.reset()  # every prompt pays full prefill, as a cold turn would
+                for i, value in enumerate(time_decode(llm, prompt, args.max_tokens)):
+                    sums[i] += value
+            totals = [t + s for t, s in zip(totals, sums)]
+            n_tokens, seconds, steps, drafted = sums
+
+            # The first token of each response belongs to prefill
+            rate = (n_tokens - len(intent_prompts)) / seconds if seconds else 0.0
+            if not draft_tokens:
+                baseline[intent] = rate
+            speedup = rate / baseline[intent] if baseline.get(intent) else float("nan")
+            # Every step emits one sampled token; the rest came from accepted drafts
+            acceptance = f"{(n_tokens - steps) / drafted:.1%}" if drafted else "-"
+            print(f"{intent:>15} {n_tokens:>7} {rate:>13.1f} {speedup:>7.2f}x {acceptance:>11}")
+
+        n_tokens, seconds, steps, drafted = totals
+        rate = (n_tokens - len(corpus)) / seconds if seconds else 0.0
+        acceptance = f"{(n_tokens - steps) / drafted:.1%}" if drafted else "-"
+        print(f"{'all':>15} {n_tokens:>7} {rate:>13.1f} "
+              f"{'':>8} {acceptance:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# scripts/compare_intent_backends.py
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.intent_cls import IntentSentimentClassifier
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SAMPLES_PATH = BASE_DIR / "data" / "intent_samples.jsonl"
+
+
+def load_samples(path):
+    """Load labeled messages from a JSONL file of {"text", "intent"} records"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(clf, samples):
+    """Return accuracy, latencies (ms) and predicted labels for a classifier"""
+    latencies = []
+    predictions = []
+    for sample in samples:
+        start = time.perf_counter()
+        result = clf.classify_intent(sample["text"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        predictions.append(result["label"])
+
+    correct = sum(p == s["intent"] for p, s in zip(predictions, samples))
+    return correct / len(samples), sorted(latencies), predictions
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare intent accuracy and latency of the zero-shot and embedding backends")
+    parser.add_argument("--samples", type=Path, default=SAMPLES_PATH)
+    parser.add_argument("--backends", nargs="+",
+                        default=["zero_shot", "embedding"])
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    print(f"Loaded {len(samples)} labeled messages from {args.samples}\n")
+
+    predictions = {}
+    print(f"{'backend':>10} {'load (s)':>9} {'accuracy':>9} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        clf = IntentSentimentClassifier(intent_backend=backend)
+        load_time = time.perf_counter() - start
+
+        accuracy, latencies, predictions[backend] = evaluate(clf, samples)
+        print(f"{backend:>10} {load_time:>9.1f} {accuracy:>9.1%} "
+              f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f}")
+
+    if len(predictions) == 2:
+        first, second = predictions.values()
+        agreement = sum(a == b for a, b in zip(first, second)) / len(samples)
+        print(f"\nBackend agreement: {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,142 @@
 # scripts/csv2chunks.py
 
-import json
-import pandas as pd
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from json.encoder import encode_basestring_ascii
 from pathlib import Path
 
+import pandas as pd
+
+# Use absolute paths based on the project root
+BASE_DIR = Path(__file__).resolve().parent.parent
+CSV_PATH = BASE_DIR / "data" / "raw" / "gargash_mercedes_models.csv"
+DOCSTORE_PATH = BASE_DIR / "data" / "raw" / "docstore.jsonl"
 
-def main():
-    # Use absolute paths based on the project root
-    base_dir = Path(__file__).resolve().parent.parent
-    csv_path = base_dir / "data" / "raw" / "gargash_mercedes_models.csv"
-    output_path = base_dir / "data" / "raw" / "docstore.jsonl"
-
-    print(f"Loading CSV from: {csv_path}")
-
-    # Load the CSV
-    df = pd.read_csv(csv_path)
-
-    # Define a formatter function
-    def row_to_chunk(row):
-        return {
-            "id": f"{row['model_name'].strip().lower().replace(' ', '_')}",
-            "text": (
-                f"Model: {row['model_name']} | "
-                f"Body Style: {row['body_style']} | "
-                f"Powertrain: {row['powertrain']} | "
-                f"Seats: {row['number_of_seats']} | "
-                f"Starting Price: AED {row['starting_price_aed']}"
-            )
-        }
-
-    # Apply to all rows
-    chunks = [row_to_chunk(row) for _, row in df.iterrows()]
-
-    # Ensure the output directory exists
+# (label, CSV column, value prefix) in the order they appear in the chunk text
+DEFAULT_COLUMNS = [
+    ("Model", "model_name", ""),
+    ("Body Style", "body_style", ""),
+    ("Powertrain", "powertrain", ""),
+    ("Seats", "number_of_seats", ""),
+    ("Starting Price", "starting_price_aed", "AED "),
+]
+ID_COLUMN = "model_name"
+
+# Rows read (and formatted) per batch
+CHUNK_SIZE = 100_000
+
+
+def parse_column_spec(spec):
+    """Parse "Label=column" (optionally "Label=column:prefix") into a column tuple"""
+    label, _, column = spec.partition("=")
+    column, _, prefix = column.partition(":")
+    if not label or not column:
+        raise argparse.ArgumentTypeError(f"Expected Label=column, got {spec!r}")
+    return label.strip(), column.strip(), prefix
+
+
+def json_strings(values):
+    """
+    JSON-encode a string Series (as json.dumps would)
+
+    Values made only of printable ASCII other than quotes and backslashes,
+    i.e. nearly all of them, are quoted vectorized; the rest go through the
+    C string encoder.
+    """
+    encoded = '"' + values + '"'
+    needs_escaping = values.str.contains(r'[^ -~]|["\\]', regex=True)
+    if needs_escaping.any():
+        encoded[needs_escaping] = values[needs_escaping].map(encode_basestring_ascii)
+    return encoded
+
+
+def format_chunks(df, columns=DEFAULT_COLUMNS):
+    """
+    Format a batch of CSV rows as docstore JSONL
+
+    Builds the id and "Label: value | ..." text with vectorized string
+    operations, so no Python code runs per row.
+
+    Returns:
+        str: One JSON object per row, each terminated by a newline
+    """
+    if df.empty:
+        return ""
+
+    ids = df[ID_COLUMN].astype(str).str.strip().str.lower().str.replace(" ", "_", regex=False)
+
+    text = None
+    for label, column, prefix in columns:
+        part = f"{label}: {prefix}" + df[column].astype(str)
+        text = part if text is None else text + " | " + part
+
+    lines = '{"id": ' + json_strings(ids) + ', "text": ' + json_strings(text) + "}\n"
+    return "".join(lines.tolist())
+
+
+def convert_csv(csv_path=CSV_PATH, output_path=DOCSTORE_PATH, columns=DEFAULT_COLUMNS,
+                chunksize=CHUNK_SIZE, workers=1):
+    """
+    Stream a CSV into the docstore JSONL in batches of `chunksize` rows
+
+    With workers > 1, batches are formatted in a process pool while the next
+    ones are read; output order always follows the CSV. The docstore is
+    written to a temporary file and renamed into place when complete.
+
+    Returns:
+        int: Number of chunks written
+    """
+    output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+
+    usecols = list(dict.fromkeys([ID_COLUMN] + [column for _, column, _ in columns]))
+    # Read every column as text: values are only ever formatted, never computed on
+    reader = pd.read_csv(csv_path, usecols=usecols, dtype=str, chunksize=chunksize)
+
+    n_chunks = 0
+    with open(tmp_path, "w") as f:
+        if workers <= 1:
+            for df in reader:
+                f.write(format_chunks(df, columns))
+                n_chunks += len(df)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Bound the batches in flight so memory stays flat on huge CSVs
+                pending = deque()
+                for df in reader:
+                    pending.append(executor.submit(format_chunks, df, columns))
+                    n_chunks += len(df)
+                    if len(pending) >= 2 * workers:
+                        f.write(pending.popleft().result())
+                while pending:
+                    f.write(pending.popleft().result())
+    os.replace(tmp_path, output_path)
+    return n_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the models CSV into docstore chunks")
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    parser.add_argument("--output", type=Path, default=DOCSTORE_PATH)
+    parser.add_argument("--column", dest="columns", action="append", default=[],
+                        type=parse_column_spec, metavar="LABEL=COLUMN[:PREFIX]",
+                        help="Additional column to include in the chunk text "
+                             "(e.g. \"Range=range_km\"); can be repeated")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes formatting batches in parallel")
+    args = parser.parse_args()
 
-    # Save to JSONL format
-    print(f"Saving {len(chunks)} chunks to: {output_path}")
-    with open(output_path, "w") as f:
-        for chunk in chunks:
-            f.write(json.dumps(chunk) + "\n")
+    print(f"Loading CSV from: {args.csv}")
+    n_chunks = convert_csv(args.csv, args.output, DEFAULT_COLUMNS + args.columns,
+                           args.chunksize, args.workers)
+    print(f"Saved {n_chunks} chunks to: {args.output}")
 
     print(
-        f"✅ Successfully created docstore with {len(chunks)} Mercedes-Benz models")
+        f"✅ Successfully created docstore with {n_chunks} Mercedes-Benz models")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
 # scripts/embed_chunks.py
 
+import argparse
+import hashlib
 import json
 import os
 import sys
+import time
 import numpy as np
 import faiss
 from tqdm import tqdm
@@ -11,6 +14,10 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from app.attribute_index import AttributeIndex
+from app.bm25 import BM25Index
+from app.docstore import file_fingerprint, parse_metadata, write_binary_docstore
+
 try:
     from sentence_transformers import SentenceTransformer
 except ImportError:
@@ -23,8 +30,44 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DOCSTORE_PATH = BASE_DIR / "data" / "raw" / "docstore.jsonl"
 FAISS_INDEX_PATH = BASE_DIR / "data" / "faiss" / "index.bin"
 ID_MAP_PATH = BASE_DIR / "data" / "faiss" / "id_map.json"
+CHUNK_HASHES_PATH = BASE_DIR / "data" / "faiss" / "chunk_hashes.json"
+EMBEDDING_CACHE_DIR = BASE_DIR / "data" / "faiss" / "embedding_cache"
+INDEX_CONFIG_PATH = BASE_DIR / "data" / "faiss" / "index_config.json"
+# Fingerprints of the index and id map written together (see save_index_state)
+INDEX_MANIFEST_PATH = BASE_DIR / "data" / "faiss" / "index_manifest.json"
+# Memory-mapped docstore and FAISS id -> docstore row array (Retriever mmap mode)
+DOCSTORE_BIN_PATH = BASE_DIR / "data" / "raw" / "docstore.bin"
+FAISS_ROWS_PATH = BASE_DIR / "data" / "faiss" / "faiss_rows.npy"
+BM25_INDEX_PATH = BASE_DIR / "data" / "faiss" / "bm25.npz"
+ATTRIBUTE_INDEX_PATH = BASE_DIR / "data" / "raw" / "attribute_index.npz"
 MODEL_NAME = "BAAI/bge-base-en-v1.5"
 
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Index build settings and the search-time parameters (nprobe, ef_search)
+# that query_interface applies when it loads the index
+DEFAULT_INDEX_CONFIG = {
+    "type": "flat",
+    "nlist": 1024,            # IVF: number of clusters
+    "nprobe": 16,             # IVF: clusters visited per query
+    "pq_m": 16,               # IVF-PQ: sub-quantizers (must divide the dimension)
+    "pq_bits": 8,             # IVF-PQ: bits per sub-quantizer code
+    "hnsw_m": 32,             # HNSW: neighbors per node
+    "ef_construction": 200,   # HNSW: candidate list size while building
+    "ef_search": 64,          # HNSW: candidate list size while searching
+    "train_sample": 100_000,  # IVF: vectors sampled for training
+}
+
+# Rewrite the embedding cache into one shard once it has this many
+CACHE_MAX_SHARDS = 32
+
+# Embedding throughput settings. Texts are embedded in length-sorted shards of
+# EMBED_SHARD_SIZE, each written to the embedding cache as soon as it is done,
+# so an interrupted run resumes from the last finished shard.
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", 1))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 64))
+EMBED_SHARD_SIZE = int(os.environ.get("EMBED_SHARD_SIZE", 20_000))
+
 
 def load_chunks(docstore_path):
     """Load document chunks from JSONL file"""
@@ -51,67 +94,525 @@ def load_chunks(docstore_path):
     return chunks
 
 
-def embed_texts(texts, model_name):
-    """Create embeddings using sentence-transformers"""
-    print(f"Initializing model: {model_name}")
-    model = SentenceTransformer(model_name)
+def chunk_hash(text, model_name=MODEL_NAME):
+    """Hash of a chunk's text, salted with the model so a model change invalidates it"""
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent text-hash -> embedding cache.
+
+    Embeddings are stored in append-only shards (a .npy array plus a .json
+    list of hashes), so an update only writes the vectors it encoded. Both
+    files are renamed into place, the .json last, so a shard is complete
+    once its .json exists; shards that cannot be read are deleted.
+    """
+
+    def __init__(self, cache_dir=EMBEDDING_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._rows = {}  # hash -> (shard array, row)
+        self._n_shards = 0
+        self._next_shard = 0
+
+        for keys_path in sorted(self.cache_dir.glob("shard_*.json")):
+            self._next_shard = max(self._next_shard, int(keys_path.stem.split("_")[1]) + 1)
+            try:
+                vectors = np.load(keys_path.with_suffix(".npy"), mmap_mode="r")
+                with open(keys_path) as f:
+                    keys = json.load(f)
+                if len(keys) != len(vectors):
+                    raise ValueError(f"{len(keys)} hashes for {len(vectors)} vectors")
+            except (OSError, ValueError) as e:
+                print(f"Deleting unreadable embedding cache shard {keys_path.stem}: {e}")
+                keys_path.unlink()
+                keys_path.with_suffix(".npy").unlink(missing_ok=True)
+                continue
+            for row, key in enumerate(keys):
+                self._rows[key] = (vectors, row)
+            self._n_shards += 1
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def get(self, key):
+        vectors, row = self._rows[key]
+        return np.asarray(vectors[row])
+
+    def add(self, keys, vectors):
+        """Write a new shard holding `vectors` under `keys`"""
+        if not keys:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        shard = self.cache_dir / f"shard_{self._next_shard:05d}"
+
+        def write_vectors(tmp):
+            with open(tmp, "wb") as f:
+                np.save(f, vectors)
+        _replace_atomically(shard.with_suffix(".npy"), write_vectors)
+        save_json(list(keys), shard.with_suffix(".json"))
+        for row, key in enumerate(keys):
+            self._rows[key] = (vectors, row)
+        self._n_shards += 1
+        self._next_shard += 1
+
+    def clear(self):
+        """Delete every shard"""
+        self._rows = {}
+        self._n_shards = 0
+        self._next_shard = 0
+        for path in self.cache_dir.glob("shard_*"):
+            path.unlink()
+
+    def compact(self, live_keys, force=False):
+        """Rewrite the cache as one shard of `live_keys` once it has too many shards"""
+        if self._n_shards <= CACHE_MAX_SHARDS and not force:
+            return
+        keys = [k for k in dict.fromkeys(live_keys) if k in self._rows]
+        if self._n_shards <= 1 and len(keys) == len(self._rows):
+            return
+        vectors = np.array([self.get(k) for k in keys], dtype=np.float32)
+        self.clear()
+        self.add(keys, vectors)
+
+
+class TextEmbedder:
+    """
+    SentenceTransformer encoding on one process or a pool of CPU processes
+
+    With workers > 1 the sentence-transformers multi-process pool is used and
+    each worker gets an equal share of the cores, so they do not fight over
+    the same threads.
+    """
+
+    def __init__(self, model_name, workers=EMBED_WORKERS, batch_size=EMBED_BATCH_SIZE):
+        print(f"Initializing model: {model_name}")
+        self.model = SentenceTransformer(model_name, device="cpu" if workers > 1 else None)
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.pool = None
+        self.n_texts = 0
+        self.seconds = 0.0
+
+        if self.workers > 1:
+            threads = str(max(1, (os.cpu_count() or 1) // self.workers))
+            saved = os.environ.get("OMP_NUM_THREADS")
+            # Spawned workers read the thread count from the environment at startup
+            os.environ["OMP_NUM_THREADS"] = threads
+            try:
+                self.pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+            finally:
+                if saved is None:
+                    os.environ.pop("OMP_NUM_THREADS")
+                else:
+                    os.environ["OMP_NUM_THREADS"] = saved
+
+    def encode(self, texts):
+        start = time.perf_counter()
+        if self.pool is not None:
+            vectors = self.model.encode_multi_process(
+                texts, self.pool, batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, len(texts) // (4 * self.workers)))
+        else:
+            vectors = self.model.encode(texts, batch_size=self.batch_size)
+        self.seconds += time.perf_counter() - start
+        self.n_texts += len(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def report(self):
+        """Overall texts/sec and texts/sec per core"""
+        rate = self.n_texts / self.seconds if self.seconds else 0.0
+        cores = os.cpu_count() or 1
+        print(f"Embedded {self.n_texts} texts in {self.seconds:.1f}s: {rate:.1f} texts/s, "
+              f"{rate / cores:.1f} texts/s per core ({self.workers} workers on {cores} cores)")
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def embed_missing(texts_by_hash, cache, model_name, workers=EMBED_WORKERS,
+                  batch_size=EMBED_BATCH_SIZE, shard_size=EMBED_SHARD_SIZE):
+    """
+    Embed every text whose hash is not in `cache` yet
+
+    Texts are sorted by length so batches hold similarly sized texts (less
+    padding), then embedded shard by shard; each finished shard is added to
+    the cache, which makes it the checkpoint a rerun resumes from.
+    """
+    missing = [h for h in texts_by_hash if h not in cache]
+    done = len(texts_by_hash) - len(missing)
+    if not missing:
+        return
+    if done:
+        print(f"Resuming: {done} of {len(texts_by_hash)} embeddings already cached")
+
+    missing.sort(key=lambda h: len(texts_by_hash[h]), reverse=True)
+    print(f"Embedding {len(missing)} chunks...")
+    with TextEmbedder(model_name, workers, batch_size) as embedder:
+        for start in tqdm(range(0, len(missing), shard_size), desc="Shards"):
+            shard = missing[start:start + shard_size]
+            cache.add(shard, embedder.encode([texts_by_hash[h] for h in shard]))
+        embedder.report()
+
+
+def load_index_config(path=INDEX_CONFIG_PATH):
+    """Load the saved index config, filling in defaults"""
+    config = dict(DEFAULT_INDEX_CONFIG)
+    if Path(path).exists():
+        with open(path) as f:
+            config.update(json.load(f))
+    return config
 
-    print("Encoding texts...")
-    return model.encode(texts, show_progress_bar=True)
 
+def make_index(dim, n_vectors, config):
+    """Create an empty (untrained) L2 index of the configured type"""
+    index_type = config["type"]
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config["hnsw_m"])
+        index.hnsw.efConstruction = config["ef_construction"]
+        return index
+    if index_type in ("ivf_flat", "ivf_pq"):
+        # FAISS wants at least ~39 training points per cluster
+        nlist = max(1, min(config["nlist"], n_vectors // 39))
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            return faiss.IndexIVFFlat(quantizer, dim, nlist)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, config["pq_m"], config["pq_bits"])
+    raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
 
-def build_faiss_index(embeddings):
-    """Build a FAISS L2 index from embeddings"""
-    dim = embeddings.shape[1]
+
+def build_faiss_index(embeddings, ids=None, config=None):
+    """
+    Build an ID-mapped FAISS L2 index from embeddings
+
+    Vectors are stored under `ids` (default 0..n-1) so single documents can
+    later be removed or replaced without rebuilding the index. Index types
+    that need training are trained on a random sample of the embeddings.
+    """
+    config = config or DEFAULT_INDEX_CONFIG
+    n_vectors, dim = embeddings.shape
     print(
-        f"Building FAISS index with {embeddings.shape[0]} vectors of dimension {dim}...")
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+        f"Building {config['type']} FAISS index with {n_vectors} vectors of dimension {dim}...")
+    base = make_index(dim, n_vectors, config)
+    if not base.is_trained:
+        rng = np.random.default_rng(0)
+        sample_size = min(n_vectors, config["train_sample"])
+        sample = embeddings[rng.choice(n_vectors, sample_size, replace=False)]
+        print(f"Training index on {sample_size} vectors...")
+        base.train(sample)
+
+    # IVF indexes store ids natively (and do not renumber on removal, which
+    # IndexIDMap2 relies on); the others are wrapped in an id map
+    index = base if isinstance(base, faiss.IndexIVF) else faiss.IndexIDMap2(base)
+    if ids is None:
+        ids = np.arange(embeddings.shape[0], dtype=np.int64)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
     return index
 
 
+def _replace_atomically(path, write):
+    """Write to a temporary file next to `path`, then rename it over `path`"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
 def save_index(index, path):
     """Save FAISS index to disk"""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     print(f"Saving index to {path}...")
-    faiss.write_index(index, str(path))
+    _replace_atomically(path, lambda tmp: faiss.write_index(index, str(tmp)))
+
+
+def save_json(data, path):
+    """Save a JSON file to disk"""
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+    _replace_atomically(path, write)
 
 
 def save_id_map(ids, path):
     """Save document ID mapping to disk"""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     print(f"Saving ID map to {path}...")
-    with open(path, "w") as f:
-        json.dump(ids, f)
+    save_json(ids, path)
 
 
-def main():
-    print("Starting embedding process...")
-    chunks = load_chunks(DOCSTORE_PATH)
+def save_index_state(index, id_map, hashes, config, index_path=FAISS_INDEX_PATH,
+                     id_map_path=ID_MAP_PATH, hashes_path=CHUNK_HASHES_PATH,
+                     config_path=INDEX_CONFIG_PATH, manifest_path=INDEX_MANIFEST_PATH):
+    """
+    Swap in a new index, id map, chunk hashes and index config
 
-    if not chunks:
-        print("No chunks found. Please run the csv2chunks.py script first.")
-        return
+    Each file is written to a temporary path and renamed into place, so
+    readers never see a partially written file. The Retriever reloads
+    whenever the index or the id map changes; the manifest written after
+    them records both their fingerprints, so it does not pair a new index
+    with the old id map in between. The chunk hashes go last: they mark
+    the index as up to date, so an update interrupted before them is redone
+    by the next run instead of being skipped.
+    """
+    save_json(config, config_path)
+    save_index(index, index_path)
+    save_id_map(id_map, id_map_path)
+    save_json(file_fingerprints((index_path, id_map_path)), manifest_path)
+    save_json(hashes, hashes_path)
+
+
+def docstore_rows(chunks):
+    """Chunks in Retriever.docs order: first occurrence of each id, last text wins"""
+    return list({str(chunk["id"]): chunk for chunk in chunks}.values())
+
+
+def file_fingerprints(paths):
+    """File name -> file_fingerprint() of the files that exist"""
+    fingerprints = {Path(p).name: file_fingerprint(p) for p in paths}
+    return {name: fp for name, fp in fingerprints.items() if fp is not None}
+
+
+def save_bm25_index(chunks, path=BM25_INDEX_PATH,
+                    docstore_paths=(DOCSTORE_PATH, DOCSTORE_BIN_PATH)):
+    """
+    Build and write the BM25 inverted index over the docstore rows
+
+    The index records the fingerprints of `docstore_paths` (the docstore
+    files `chunks` came from or were written to), so the Retriever can
+    tell whether it still matches the docstore it loads.
+    """
+    start = time.perf_counter()
+    bm25 = BM25Index.build(chunk["text"] for chunk in docstore_rows(chunks))
+    bm25.sources = file_fingerprints(docstore_paths)
+    print(f"Saving BM25 index ({len(bm25.terms)} terms, {len(bm25.rows)} postings) to {path}...")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    bm25.save(path)
+    print(f"BM25 index built in {time.perf_counter() - start:.1f}s")
 
+
+def save_mapped_store(chunks, id_map_path=ID_MAP_PATH,
+                      docstore_bin_path=DOCSTORE_BIN_PATH, rows_path=FAISS_ROWS_PATH,
+                      attribute_index_path=ATTRIBUTE_INDEX_PATH, docstore_path=DOCSTORE_PATH,
+                      index_path=FAISS_INDEX_PATH):
+    """
+    Write the binary docstore, its attribute index and the FAISS id ->
+    docstore row array
+
+    These are what the Retriever opens in mmap mode. Rows follow the order
+    in which query_interface.load_docstore sees the documents (first
+    occurrence of each id, last text wins), so the attribute index also
+    matches the JSONL docstore at `docstore_path`.
+
+    The attribute index is written last and records the fingerprints of
+    the other files, so a Retriever refreshing while they are being
+    replaced keeps its current state until the whole set is in place.
+    """
+    docs = docstore_rows(chunks)
+    positions = {str(doc["id"]): i for i, doc in enumerate(docs)}
+    with open(id_map_path) as f:
+        id_map = json.load(f)
+
+    rows = np.full(max(map(int, id_map), default=-1) + 1, -1, dtype=np.int64)
+    for fid, doc_id in id_map.items():
+        rows[int(fid)] = positions.get(doc_id, -1)
+
+    print(f"Saving binary docstore to {docstore_bin_path}...")
+    os.makedirs(os.path.dirname(docstore_bin_path), exist_ok=True)
+    write_binary_docstore(docs, docstore_bin_path)
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            np.save(f, rows)
+    _replace_atomically(rows_path, write)
+
+    print(f"Saving attribute index to {attribute_index_path}...")
+    attribute_index = AttributeIndex([{"metadata": parse_metadata(doc["text"])} for doc in docs])
+    attribute_index.sources = file_fingerprints(
+        (docstore_path, docstore_bin_path, rows_path, index_path))
+    attribute_index.save(attribute_index_path)
+
+
+def rebuild_index(chunks, model_name=MODEL_NAME, index_path=FAISS_INDEX_PATH,
+                  id_map_path=ID_MAP_PATH, hashes_path=CHUNK_HASHES_PATH,
+                  cache_dir=EMBEDDING_CACHE_DIR, config=None,
+                  config_path=INDEX_CONFIG_PATH, resume=True,
+                  manifest_path=INDEX_MANIFEST_PATH, **embed_options):
+    """
+    Build the index from scratch
+
+    Embeddings already in the cache (from an interrupted rebuild or earlier
+    runs with the same model) are reused unless resume=False.
+    `embed_options` go to embed_missing (workers, batch_size, shard_size).
+    """
+    config = config or load_index_config(config_path)
     texts = [chunk["text"] for chunk in chunks]
     ids = [chunk["id"] for chunk in chunks]
+    hashes = {str(id): chunk_hash(text, model_name) for id, text in zip(ids, texts)}
 
-    print(f"Embedding {len(texts)} chunks...")
-    embeddings = embed_texts(texts, MODEL_NAME)
+    cache = EmbeddingCache(cache_dir)
+    if not resume:
+        cache.clear()
+    embed_missing({h: text for h, text in zip(hashes.values(), texts)}, cache,
+                  model_name, **embed_options)
+    embeddings = np.array([cache.get(hashes[str(id)]) for id in ids], dtype=np.float32)
 
     print("Building FAISS index...")
-    index = build_faiss_index(np.array(embeddings))
+    index = build_faiss_index(embeddings, config=config)
 
-    print(f"Saving index to {FAISS_INDEX_PATH}...")
-    save_index(index, FAISS_INDEX_PATH)
+    # Keep only this docstore's embeddings for later incremental updates
+    cache.compact(hashes.values(), force=True)
 
-    print(f"Saving ID map to {ID_MAP_PATH}...")
     # Create a mapping from index position to document ID
     id_map = {str(i): str(id) for i, id in enumerate(ids)}
-    save_id_map(id_map, ID_MAP_PATH)
+    save_index_state(index, id_map, hashes, config, index_path, id_map_path,
+                     hashes_path, config_path, manifest_path)
+
+
+def update_index(chunks, model_name=MODEL_NAME, index_path=FAISS_INDEX_PATH,
+                 id_map_path=ID_MAP_PATH, hashes_path=CHUNK_HASHES_PATH,
+                 cache_dir=EMBEDDING_CACHE_DIR, config=None,
+                 config_path=INDEX_CONFIG_PATH, manifest_path=INDEX_MANIFEST_PATH,
+                 **embed_options):
+    """
+    Bring an existing index up to date with the docstore
+
+    Only new or changed chunks are embedded (and only if the embedding cache
+    does not already hold them); deleted chunks are removed by id.
+
+    Returns:
+        bool: False if there is no incremental state to update, the index
+              type changed or the index cannot remove vectors (HNSW), so a
+              full rebuild is needed
+    """
+    if not (Path(index_path).exists() and Path(id_map_path).exists()
+            and Path(hashes_path).exists()):
+        return False
+
+    saved_config = load_index_config(config_path)
+    config = {**saved_config, **(config or {})}
+    if config["type"] != saved_config["type"]:
+        return False
+
+    index = faiss.read_index(str(index_path))
+    if not isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+        return False
+    with open(id_map_path) as f:
+        id_map = json.load(f)
+    with open(hashes_path) as f:
+        old_hashes = json.load(f)
+
+    texts = {str(chunk["id"]): chunk["text"] for chunk in chunks}
+    new_hashes = {id: chunk_hash(text, model_name) for id, text in texts.items()}
+    faiss_ids = {doc_id: int(fid) for fid, doc_id in id_map.items()}
+
+    removed = [id for id in old_hashes if id not in new_hashes]
+    changed = [id for id in new_hashes if id in old_hashes and old_hashes[id] != new_hashes[id]]
+    added = [id for id in new_hashes if id not in old_hashes]
+    print(f"{len(added)} new, {len(changed)} changed, {len(removed)} deleted chunks")
+    if not (removed or changed or added):
+        if config != saved_config:
+            save_json(config, config_path)
+            print("Index config updated.")
+        print("Index is already up to date.")
+        return True
+
+    # Drop deleted and changed vectors
+    stale = [faiss_ids[id] for id in removed + changed if id in faiss_ids]
+    if stale:
+        try:
+            index.remove_ids(np.array(stale, dtype=np.int64))
+        except RuntimeError as e:
+            print(f"Index does not support removal ({e})")
+            return False
+    for id in removed:
+        id_map.pop(str(faiss_ids.get(id)), None)
+
+    # Embed only what the cache does not have
+    cache = EmbeddingCache(cache_dir)
+    to_embed = changed + added
+    embed_missing({new_hashes[id]: texts[id] for id in to_embed}, cache, model_name,
+                  **embed_options)
+
+    # Changed chunks keep their id, new chunks get fresh ones
+    next_id = max(faiss_ids.values(), default=-1) + 1
+    ids = []
+    for id in to_embed:
+        if id not in faiss_ids:
+            faiss_ids[id] = next_id
+            next_id += 1
+        ids.append(faiss_ids[id])
+        id_map[str(faiss_ids[id])] = id
+
+    vectors = np.array([cache.get(new_hashes[id]) for id in to_embed], dtype=np.float32)
+    index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+    cache.compact(new_hashes.values())
+
+    save_index_state(index, id_map, new_hashes, config, index_path, id_map_path,
+                     hashes_path, config_path, manifest_path)
+    return True
+
+
+def main(incremental=False, index_config=None, resume=True, **embed_options):
+    """
+    Embed the docstore and write the FAISS index
+
+    Args:
+        incremental (bool): Update the existing index instead of rebuilding it
+        index_config (dict, optional): Overrides for the saved index config
+            (see DEFAULT_INDEX_CONFIG)
+        resume (bool): Reuse cached embeddings when rebuilding
+        **embed_options: workers, batch_size and shard_size for embed_missing
+    """
+    config = {**load_index_config(), **(index_config or {})}
+    print("Starting embedding process...")
+    chunks = load_chunks(DOCSTORE_PATH)
+
+    if not chunks:
+        print("No chunks found. Please run the csv2chunks.py script first.")
+        return
+
+    if incremental:
+        if update_index(chunks, config=config, **embed_options):
+            save_mapped_store(chunks)
+            save_bm25_index(chunks)
+            print("✅ Incremental update completed.")
+            return
+        print("Cannot update the index incrementally, rebuilding from scratch...")
 
+    rebuild_index(chunks, config=config, resume=resume, **embed_options)
+    save_mapped_store(chunks)
+    save_bm25_index(chunks)
     print("✅ Embedding completed.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Embed docstore chunks into a FAISS index")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed new or changed chunks and update the existing index")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="Re-embed everything instead of reusing cached embeddings")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS,
+                        help="CPU processes used for embedding")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--shard-size", type=int, default=EMBED_SHARD_SIZE,
+                        help="Texts embedded between checkpoints")
+    parser.add_argument("--index-type", dest="type", choices=INDEX_TYPES)
+    for key, value in DEFAULT_INDEX_CONFIG.items():
+        if key != "type":
+            parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=type(value))
+    args = vars(parser.parse_args())
+    incremental = args.pop("incremental")
+    resume = args.pop("resume")
+    embed_options = {key: args.pop(key) for key in ("workers", "batch_size", "shard_size")}
+    main(incremental=incremental,
+         index_config={k: v for k, v in args.items() if v is not None},
+         resume=resume, **embed_options)